@@ -115,14 +115,81 @@ class ElasticSearch:
         url = '/'.join([self.base_url, 'term', ilx_id])
         return self.get(url, auth=(self.username, self.password))
 
-    def search_by_ilx_ids(self, ilx_ids, LIMIT=25, _print=True, debug=False):
-        urls = []
-        for ilx_id in ilx_ids:
-            ilx_id = str(ilx_id)
-            ilx_id = ilx_id if 'ilx_' in ilx_id else ('ilx_' + ilx_id)
-            urls.append('/'.join([self.base_url, 'term', ilx_id]))
+    def search_by_ilx_ids(self, ilx_ids, LIMIT=25, _print=True, debug=False,
+                          chunk_size=1000, cache=None):
+        """ Batched lookup through the _mget endpoint.
+
+            Returns the _source of each id in input order, None for ids that
+            could not be found. Reasons for the misses are kept per id in
+            self.errors. cache is an optional dict like object of
+            ilx_id -> _source that is checked first and filled with hits.
+
+            _print no longer prints every _source as it arrives, only the
+            action header and then one line per id that was not found. """
+        ilx_ids = [self.fix_ilx(ilx_id) for ilx_id in ilx_ids]
+        cache = {} if cache is None else cache
+        todo = list(dict.fromkeys(i for i in ilx_ids if i not in cache))
+        chunks = [todo[i:i + chunk_size] for i in range(0, len(todo), chunk_size)]
         action = 'Searching Elastic via ILX IDs'
-        return self.get_async(urls, LIMIT=LIMIT, _print=_print, debug=debug, action=action)
+        self.errors = {}
+        for docs in self.mget_async(chunks, LIMIT=LIMIT, _print=_print, action=action):
+            for ilx_id, doc in docs.items():
+                if doc.get('error'):
+                    self.errors[ilx_id] = str(doc['error'])
+                elif not doc.get('found', '_source' in doc) or not doc.get('_source'):
+                    self.errors[ilx_id] = 'not found'
+                else:
+                    cache[ilx_id] = doc['_source']
+
+        if _print:
+            for ilx_id, error in sorted(self.errors.items()):
+                print(ilx_id, error)
+
+        if debug:
+            return [{'success': i} if i in cache else {'failed': i, 'error': self.errors.get(i)}
+                    for i in ilx_ids]
+
+        return [cache.get(i) for i in ilx_ids]
+
+    @staticmethod
+    def fix_ilx(ilx_id):
+        ilx_id = str(ilx_id)
+        return ilx_id if 'ilx_' in ilx_id else ('ilx_' + ilx_id)
+
+    def mget_async(self, chunks, LIMIT, _print, action):
+        """ one _mget request per chunk of ids, yields {ilx_id: doc}
+            for each chunk as it is decoded """
+        url = '/'.join([self.base_url, 'term', '_mget'])
+
+        async def get_chunk(ids, session):
+            try:
+                async with session.post(url, json={'ids': ids}) as response:
+                    if response.status not in [200, 201]:
+                        error = 'status ' + str(response.status) + ' ' + await response.text()
+                        return {i: {'error': error} for i in ids}
+
+                    output = await response.json(content_type=None)
+            except Exception as e:  # keep the other chunks
+                return {i: {'error': repr(e)} for i in ids}
+
+            docs = {doc.get('_id'): doc for doc in (output or {}).get('docs', [])}
+            return {i: docs.get(i, {'error': 'missing from response'}) for i in ids}
+
+        async def get_all(loop):
+            if _print:
+                print('=== {0} ==='.format(action))
+            auth = BasicAuth(self.username, self.password)
+            connector = TCPConnector(limit=LIMIT)
+            async with ClientSession(
+                    connector=connector, loop=loop, auth=auth) as session:
+                return [await f for f in asyncio.as_completed(
+                    [get_chunk(ids, session) for ids in chunks])]
+
+        if not chunks:
+            return []
+
+        loop = asyncio.get_event_loop()
+        return loop.run_until_complete(get_all(loop))
 
 
 def batch(data, seg_length, func, **kwargs):
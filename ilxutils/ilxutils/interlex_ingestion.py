@@ -9,6 +9,7 @@ from sys import exit
 from typing import Union, List, Dict, Tuple
 
 from ilxutils.ontopandas import OntoPandas
+from ilxutils.mydifflib import NgramIndex
 
 
 class InterLexIngestion:
@@ -29,6 +30,7 @@ class InterLexIngestion:
         self.curie2row = self.sql.get_curie2row()
         self.fragment2rows = self.sql.get_fragment2rows()
         self.terms_complete = self.sql.get_terms_complete()
+        self._fuzzy_index = None
 
     def grab_rdflib_graph_version(g: Graph) -> str:
         ''' Crap-shot for ontology iri if its properly in the header and correctly formated '''
@@ -497,6 +499,86 @@ class InterLexIngestion:
             return inside, outside, diff
         return inside, outside
 
+    @property
+    def fuzzy_index(self) -> NgramIndex:
+        ''' Character n-gram index over degraded InterLex labels and synonyms, values are ilx ids '''
+        if self._fuzzy_index is None:
+            index = NgramIndex(degrade=self.local_degrade)
+            for label, rows in self.label2rows.items():
+                for row in rows:
+                    index.add(label, row['ilx'])
+            synonyms = self.sql.get_synonyms()
+            for ilx, literal in zip(synonyms['ilx'], synonyms['literal']):
+                if isinstance(literal, str) and literal.strip():
+                    index.add(literal, ilx)
+            self._fuzzy_index = index
+        return self._fuzzy_index
+
+    def fuzzy_label_check( self,
+                           ontology:pd.DataFrame,
+                           label_predicate:str = 'rdfs:label',
+                           synonym_predicates:List[str] = (),
+                           threshold:float = .8,
+                           k:int = 5,
+                           diff:bool = True, ) -> Tuple[list]:
+        ''' Label and synonym check that also finds near matches
+
+            Candidates come from the n-gram index so only shortlisted pairs are scored with
+            mydifflib.ratio instead of every ontology row against every InterLex row.
+
+            Args:
+                ontology: pandas DataFrame created from an ontology where the colnames are predicates
+                    and if classes exist it is also thrown into a the colnames.
+                label_predicate: usually in qname form and is the colname of the DataFrame for the label
+                synonym_predicates: colnames of the DataFrame whose values are also searched
+                threshold: minimum ratio for a near match
+                k: maximum number of matches kept per label or synonym
+                diff: exhaustive diff between the row and its matches
+            Returns:
+                inside: entities with matches, matches holds (ratio, matched string, ilx row)
+                outside: entities NOT in InterLex
+                diff (optional): List[List[dict]] '''
+
+        header = ['Index'] + list(ontology.columns)
+        rows, queries = [], []
+        for row in ontology.itertuples():
+            row = {header[i]:val for i, val in enumerate(row)}
+            strings = []
+            for predicate in (label_predicate, *synonym_predicates):
+                values = row.get(predicate)
+                values = values if isinstance(values, list) else [values]
+                strings.extend(v for v in values if isinstance(v, str) and v.strip())
+            rows.append(row)
+            queries.append(strings)
+
+        # one batch so strings repeated across the ontology are only searched once
+        flat = [string for strings in queries for string in strings]
+        results = iter(self.fuzzy_index.search_many(flat, k=k, threshold=threshold))
+
+        inside, outside = [], []
+        for row, strings in zip(rows, queries):
+            matches = {}
+            for _ in strings:
+                for score, string, ilx_ids in next(results):
+                    for ilx_id in ilx_ids:
+                        if score > matches.get(ilx_id, (0,))[0]:
+                            matches[ilx_id] = score, string
+            if matches:
+                inside.append({
+                    'external_ontology_row': row,
+                    'ilx_rows': [self.ilx2row[ilx_id] for ilx_id in matches if ilx_id in self.ilx2row],
+                    'matches': sorted(((score, string, self.ilx2row.get(ilx_id))
+                                       for ilx_id, (score, string) in matches.items()),
+                                      key=lambda m: m[0], reverse=True),
+                })
+            else:
+                outside.append(row)
+
+        if diff:
+            diff = self.__exhaustive_diff(inside)
+            return inside, outside, diff
+        return inside, outside
+
 def example():
     ii = InterLexIngestion(from_backup=True)
     g = Graph().parse(str(Path.home()/'Dropbox/scidumps/CUMBO/CUMBO_Definitions_20130711.owl'), format='xml')
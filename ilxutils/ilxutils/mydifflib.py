@@ -1,5 +1,8 @@
+import math
+import heapq
 import difflib
 import json
+from collections import defaultdict
 from pyontutils.utils import TermColors
 import sys
 
@@ -42,6 +45,91 @@ def ratio(s1, s2):
     return difflib.SequenceMatcher(None, s1, s2).ratio()
 
 
+class NgramIndex:
+    ''' Character n-gram inverted index for fuzzy string lookup.
+
+        Candidates are the indexed strings that share the most n-grams with the
+        query (dice coefficient on n-gram sets) and only that shortlist is scored
+        with ratio, so lookups do not compare against every indexed string.
+
+        >>> index = NgramIndex()
+        >>> index.add('Purkinje cell', 'ilx_1')
+        >>> index.search('purkinje cells')[0][1:]
+        ('purkinje cell', ['ilx_1'])
+    '''
+
+    def __init__(self, n=3, degrade=lambda string: string.lower().strip()):
+        self.n = n
+        self.degrade = degrade
+        self.strings = []
+        self.values = []
+        self.gramsets = []
+        self.ids = {}
+        self.postings = defaultdict(list)
+
+    def grams(self, string):
+        padded = ' ' * (self.n - 1) + string + ' ' * (self.n - 1)
+        return frozenset(padded[i:i + self.n] for i in range(len(padded) - self.n + 1))
+
+    def add(self, string, value):
+        ''' index value under the degraded string, repeated strings share an entry '''
+        key = self.degrade(string)
+        if key not in self.ids:
+            id = self.ids[key] = len(self.strings)
+            self.strings.append(key)
+            self.values.append([])
+            grams = self.grams(key)
+            self.gramsets.append(grams)
+            for gram in grams:
+                self.postings[gram].append(id)
+
+        values = self.values[self.ids[key]]
+        if value not in values:
+            values.append(value)
+
+    def candidates(self, string, k=25, min_dice=.5):
+        ''' (dice, id) for the k indexed strings sharing the most n-grams '''
+        query = self.grams(string)
+        size = len(query)
+        # anything with dice >= min_dice shares at least need grams with the query
+        # so it must share one of the size - need + 1 rarest, the rest are never scanned
+        need = max(1, math.ceil(min_dice * size / (2 - min_dice)))
+        rarest = sorted(query, key=lambda gram: len(self.postings.get(gram, ())))
+        ids = set()
+        for gram in rarest[:size - need + 1]:
+            ids.update(self.postings.get(gram, ()))
+
+        scored = ((2 * len(query & self.gramsets[id]) / (size + len(self.gramsets[id])), id)
+                  for id in ids)
+        return heapq.nlargest(k, (c for c in scored if c[0] >= min_dice))
+
+    def search(self, string, k=10, threshold=.8, shortlist=25):
+        ''' [(ratio, indexed string, values), ...] best first '''
+        key = self.degrade(string)
+        if key in self.ids:  # exact matches need no scoring
+            id = self.ids[key]
+            exact = [(1.0, key, self.values[id])]
+        else:
+            exact = []
+
+        out = exact + [(score, self.strings[id], self.values[id])
+                       for score, id in ((ratio(key, self.strings[id]), id)
+                                         for _, id in self.candidates(key, k=shortlist))
+                       if score >= threshold and self.strings[id] != key]
+        return sorted(out, key=lambda r: r[0], reverse=True)[:k]
+
+    def search_many(self, strings, **kwargs):
+        ''' batch search, each distinct degraded string is only searched once '''
+        memo = {}
+        out = []
+        for string in strings:
+            key = self.degrade(string)
+            if key not in memo:
+                memo[key] = self.search(key, **kwargs)
+            out.append(memo[key])
+        return out
+
+
 def create_html(s1, s2, output='test.html'):
     ''' creates basic html based on the diff of 2 strings '''
     html = difflib.HtmlDiff().make_file(s1.split(), s2.split())
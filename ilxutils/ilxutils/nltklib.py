@@ -2,6 +2,8 @@
 nltk.download(['wordnet', 'stopwords', 'punkt']) if not already downloaded.
 Should add to wordnet if you want more words to compare as reference to.
 '''
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from nltk import word_tokenize, pos_tag
 from nltk.corpus import wordnet as wn
 
@@ -33,28 +35,27 @@ def tagged_to_synset(word, tag):
         return None
 
 
-def sentence_similarity(sentence1, sentence2):
-    """ compute the sentence similarity using Wordnet """
+@lru_cache(maxsize=2 ** 16)
+def sentence_synsets(sentence):
+    """ synsets of the tagged words of a sentence, words without one are dropped """
     # Tokenize and tag
-    sentence1 = pos_tag(word_tokenize(sentence1))
-    sentence2 = pos_tag(word_tokenize(sentence2))
+    tagged = pos_tag(word_tokenize(sentence))
+    # Get the synsets for the tagged words and filter out the Nones
+    return tuple(ss for ss in (tagged_to_synset(*tagged_word) for tagged_word in tagged) if ss)
 
-    # Get the synsets for the tagged words
-    synsets1 = [tagged_to_synset(*tagged_word) for tagged_word in sentence1]
-    synsets2 = [tagged_to_synset(*tagged_word) for tagged_word in sentence2]
-
-    # Filter out the Nones
-    synsets1 = [ss for ss in synsets1 if ss]
-    synsets2 = [ss for ss in synsets2 if ss]
-    #print(synsets1)
-    #print(synsets2)
+
+@lru_cache(maxsize=2 ** 20)
+def path_similarity(synset1, synset2):
+    return synset1.path_similarity(synset2)
+
+
+def synsets_similarity(synsets1, synsets2):
     score, count = 0.0, 0.0
 
     # For each word in the first sentence
     for synset in synsets1:
         # Get the similarity value of the most similar word in the other sentence
-
-        best_score=[synset.path_similarity(ss) for ss in synsets2 if synset.path_similarity(ss)]
+        best_score = [s for s in (path_similarity(synset, ss) for ss in synsets2) if s]
 
         # Check that the similarity could have been computed
         if best_score:
@@ -69,6 +70,42 @@ def sentence_similarity(sentence1, sentence2):
 
     return score
 
+
+def sentence_similarity(sentence1, sentence2):
+    """ compute the sentence similarity using Wordnet """
+    return synsets_similarity(sentence_synsets(sentence1), sentence_synsets(sentence2))
+
+
+def _sentence_similarities(pairs):
+    return [sentence_similarity(s1, s2) for s1, s2 in pairs]
+
+
+def sentence_similarities(pairs, n_jobs=1, chunksize=1000):
+    """ sentence_similarity for each (sentence1, sentence2) pair in order
+
+        Each sentence is tokenized, tagged and resolved to synsets once and
+        path similarities between synsets are cached, so comparing one
+        definition against many only does the work for the fixed side once.
+        n_jobs > 1 fans contiguous chunks of pairs out to worker processes,
+        which each keep their own caches. """
+    pairs = list(pairs)
+    if n_jobs == 1 or len(pairs) <= chunksize:
+        return _sentence_similarities(pairs)
+
+    chunks = [pairs[i:i + chunksize] for i in range(0, len(pairs), chunksize)]
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        return [score for scores in executor.map(_sentence_similarities, chunks)
+                for score in scores]
+
+
+def similarity_matrix(sentences1, sentences2, n_jobs=1):
+    """ rows are sentences1 and columns are sentences2 """
+    sentences1, sentences2 = list(sentences1), list(sentences2)
+    scores = iter(sentence_similarities(((s1, s2) for s1 in sentences1 for s2 in sentences2),
+                                        n_jobs=n_jobs))
+    return [[next(scores) for _ in sentences2] for _ in sentences1]
+
+
 def get_tokenized_sentence(sentence):
     # Tokenize and tag
     sentence = pos_tag(word_tokenize(sentence))
@@ -15,6 +15,7 @@
 
 from collections import defaultdict
 from docopt import docopt
+import numpy as np
 import pandas as pd
 from pathlib import Path as p
 import pickle
@@ -23,6 +24,7 @@ from rdflib import BNode
 from sys import exit
 from typing import Union, List, Dict
 from ilxutils.tools import create_pickle, open_pickle
+from ttlser.utils import QnameResolver
 VERSION = '0.5' # fixed NaN issue in empty cells
 
 
@@ -50,6 +52,7 @@ class OntoPandas:
         self.str_vals = str_vals
         self.g = obj  # could be path
         self.path = obj  # could be graph
+        self._qnames = None
         self.df = self.Graph2Pandas_converter()
 
     def create_pickle(self, output: str) -> None:
@@ -65,9 +68,17 @@ class OntoPandas:
 
     def qname(self, uri: str) -> str:
         ''' Returns qname of uri in rdflib graph while also saving it '''
+        if self._qnames is None:
+            self._qnames = QnameResolver.from_graph(self.g)
+
+        qname = self._qnames.qname(uri)
+        if qname is not None:
+            return qname
+
         try:
             prefix, namespace, name = self.g.compute_qname(uri)
             qname = prefix + ':' + name
+            self._qnames = None  # compute_qname may have generated a prefix
             return qname
         except:
             try:
@@ -87,18 +98,18 @@ class OntoPandas:
             if filetype == '.pickle':
                 self.g = pickle.load(open(self.path, 'rb'))
                 if isinstance(self.g, rdflib.graph.Graph):
-                    return self.get_sparql_dataframe()
+                    return self.get_dataframe()
                 else:
                     print('WARNING:: function df() wont work unless an ontology source is loaded')
                     return self.g
             elif filetype == '.ttl' or filetype == '.rdf':
                 self.g = rdflib.Graph()
                 self.g.parse(self.path, format='turtle')
-                return self.get_sparql_dataframe()
+                return self.get_dataframe()
             elif filetype == '.nt':
                 self.g = rdflib.Graph()
                 self.g.parse(self.path, format='nt')
-                return self.get_sparql_dataframe()
+                return self.get_dataframe()
             elif filetype == '.owl' or filetype == '.xrdf':
                 self.g = rdflib.Graph()
                 try:
@@ -106,22 +117,69 @@ class OntoPandas:
                 except:
                     # some owl formats are more rdf than owl
                     self.g.parse(self.path, format='turtle')
-                return self.get_sparql_dataframe()
+                return self.get_dataframe()
             else:
                 exit('Format options: owl, ttl, df_pickle, rdflib.Graph()')
             try:
-                return self.get_sparql_dataframe()
+                return self.get_dataframe()
                 self.path = None
             except:
                 exit('Format options: owl, ttl, df_pickle, rdflib.Graph()')
 
         elif isinstance(self.g, rdflib.graph.Graph):
             self.path = None
-            return self.get_sparql_dataframe()
+            return self.get_dataframe()
 
         else:
             exit('Obj given is not str, pathlib obj, or an rdflib.Graph()')
 
+    def get_dataframe(self):
+        ''' The default query is answered directly from the store, anything else goes through sparql '''
+        if self.query == self.defaultquery:
+            return self.get_store_dataframe()
+        return self.get_sparql_dataframe()
+
+    def get_store_dataframe(self):
+        ''' Same frame as get_sparql_dataframe with the default query from one pass over the store.
+            Terms are factorized into integer codes so str and qname only run once per unique term
+            and the wide frame is built from the codes with groupby and unstack. '''
+        classes = set(s for s in self.g.subjects(rdflib.RDF.type, rdflib.OWL.Class)
+                      if not isinstance(s, BNode))
+        triples = [(s, p, o) for s, p, o in self.g
+                   if s in classes and not isinstance(p, BNode) and not isinstance(o, BNode)]
+        if not triples:
+            return pd.DataFrame(columns=['iri'])
+
+        subjs, preds, objs = (np.array(terms, dtype=object) for terms in zip(*triples))
+        subj_codes, subj_uniques = pd.factorize(subjs, sort=True)
+        pred_codes, pred_uniques = pd.factorize(preds, sort=True)
+        obj_codes, obj_uniques = pd.factorize(objs)
+
+        if self.qnamed:
+            pred_uniques = np.array([self.qname(pred) for pred in pred_uniques], dtype=object)
+        if self.str_vals:
+            subj_uniques, pred_uniques, obj_uniques = (np.array([str(u) for u in uniques], dtype=object)
+                                                       for uniques in (subj_uniques, pred_uniques, obj_uniques))
+
+        codes = pd.DataFrame({'subj': subj_codes, 'pred': pred_codes, 'obj': obj_codes})
+        sizes = codes.groupby(['subj', 'pred'])['obj'].transform('size')
+        # most cells have a single value so only the rest pay for building lists
+        single = codes[sizes.values == 1]
+        cells = pd.Series(obj_uniques.take(single['obj'].values),
+                          index=pd.MultiIndex.from_arrays([single['subj'], single['pred']]))
+        multiple = codes[sizes.values > 1]
+        if len(multiple):
+            lists = (pd.Series(obj_uniques.take(multiple['obj'].values), index=multiple.index)
+                     .groupby([multiple['subj'], multiple['pred']]).agg(list))
+            cells = pd.concat([cells, lists])
+
+        df = cells.unstack('pred')
+        df.index = subj_uniques.take(df.index.values)
+        df.columns = list(pred_uniques.take(df.columns.values))
+        df = df.astype(object).where((pd.notnull(df)), None) # default Null is fricken Float NaN
+        df = df.reset_index().rename(columns={'index':'iri'})
+        return df
+
     def get_sparql_dataframe_deprecated_memory_problem(self):
         ''' Iterates through the sparql table and condenses it into a Pandas DataFrame
         !!! OLD !!! Eats up double the memory and produces lists for everything that has a value '''
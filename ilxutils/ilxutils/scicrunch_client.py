@@ -1,4 +1,4 @@
-from aiohttp import ClientSession, TCPConnector, BasicAuth
+from aiohttp import ClientSession, TCPConnector, BasicAuth, ClientError, ClientConnectorError
 import asyncio
 from collections import defaultdict, namedtuple
 from IPython import embed
@@ -8,12 +8,142 @@ import random
 import requests as r
 import string
 from sys import exit
+from time import perf_counter
 from typing import Union, List, Dict
 import ilxutils.scicrunch_client_helper as scicrunch_client_helper
 import os
 # TODO: create a check for superclass... if entity superclass is known to be different then create your own. else biggy back known entity
 # THOUGHTS: What if you don't know if superclass is different?
 
+class Metrics:
+    """ Request counts and latencies for an AsyncClient """
+
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.retries = 0
+        self.start = perf_counter()
+
+    def record(self, seconds, error=False):
+        self.latencies.append(seconds)
+        if error:
+            self.errors += 1
+
+    def percentile(self, q):
+        if not self.latencies:
+            return None
+        latencies = sorted(self.latencies)
+        return latencies[int(round(q * (len(latencies) - 1)))]
+
+    def stats(self):
+        elapsed = perf_counter() - self.start
+        return {
+            'requests': len(self.latencies),
+            'errors': self.errors,
+            'retries': self.retries,
+            'seconds': elapsed,
+            'requests_per_second': len(self.latencies) / elapsed if elapsed else 0,
+            'p50': self.percentile(.5),
+            'p99': self.percentile(.99),
+        }
+
+
+class AsyncClient:
+    """ Long lived aiohttp session shared by every batch a scicrunch
+        instance sends. One connection pool, a semaphore bounding the number
+        of requests in flight, and retries with exponential backoff for
+        connection errors and retryable status codes. Requests that are not
+        idempotent are only retried when the connection could not be made.
+        Call close when done or use it as a context manager. """
+
+    retry_statuses = {429, 500, 502, 503, 504}
+
+    def __init__(self, auth=None, limit=50, retries=5, backoff=.25):
+        self.auth = auth
+        self.limit = limit
+        self.retries = retries
+        self.backoff = backoff
+        self.metrics = Metrics()
+        self.loop = asyncio.new_event_loop()
+        self._session = None
+        self._semaphore = None
+
+    async def _ensure(self):
+        # the session and semaphore have to be created inside the running loop
+        if self._session is None:
+            self._session = ClientSession(connector=TCPConnector(limit=self.limit),
+                                          auth=self.auth)
+            self._semaphore = asyncio.Semaphore(self.limit)
+
+    async def request(self, method, url, retry_when=None, idempotent=True, **kwargs):
+        """ returns status, output where output is decoded json when
+            possible and text otherwise. retry_when(status, output) can
+            mark additional responses as retryable, set idempotent=False
+            when repeating a request that the server may have seen would
+            do something twice """
+        await self._ensure()
+        async with self._semaphore:
+            for attempt in range(self.retries + 1):
+                start = perf_counter()
+                error = status = output = None
+                try:
+                    async with self._session.request(method, url, **kwargs) as response:
+                        status = response.status
+                        text = await response.text()
+                        try:
+                            output = json.loads(text) if text else None
+                        except ValueError:
+                            output = text
+                except (ClientError, asyncio.TimeoutError) as e:
+                    error = e
+
+                retry = (error is not None and (idempotent or
+                                                isinstance(error, ClientConnectorError)) or
+                         idempotent and status in self.retry_statuses or
+                         retry_when is not None and retry_when(status, output))
+                self.metrics.record(perf_counter() - start, error=retry)
+                if not retry or attempt == self.retries:
+                    break
+
+                self.metrics.retries += 1
+                await asyncio.sleep(self.backoff * 2 ** attempt * (1 + random.random()))
+
+            if error is not None:
+                raise error
+
+            return status, output
+
+    def run(self, coroutines, limit=None):
+        """ run coroutines to completion on the client loop, returning
+            their results in order, limit further bounds this batch """
+        async def bounded(coroutine, semaphore):
+            async with semaphore:
+                return await coroutine
+
+        async def run_all():
+            if limit is None:
+                return await asyncio.gather(*coroutines)
+            semaphore = asyncio.Semaphore(limit)
+            return await asyncio.gather(*(bounded(c, semaphore) for c in coroutines))
+
+        return self.loop.run_until_complete(run_all())
+
+    def stats(self):
+        return self.metrics.stats()
+
+    def close(self):
+        if self._session is not None:
+            self.loop.run_until_complete(self._session.close())
+            self._session = None
+        self.loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
 class scicrunch():
 
     '''
@@ -32,10 +162,30 @@ class scicrunch():
         deleteTerms                 ilx_ids .. crawl=True .
     '''
 
-    def __init__(self, api_key, base_url, auth=('None', 'None')):
+    def __init__(self, api_key, base_url, auth=('None', 'None'), client=None):
         self.api_key = api_key
         self.base_url = base_url
         self.auth = BasicAuth(auth)
+        self._client = client
+
+    @property
+    def client(self):
+        """ shared by every concurrent get and post, see client.stats() """
+        if self._client is None:
+            self._client = AsyncClient(auth=BasicAuth('scicrunch', 'perl22(query)'))
+        return self._client
+
+    def close(self):
+        """ close the client session and loop if they were ever used """
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
 
     def crawl_get(self, urls):
         outputs = {}
@@ -150,162 +300,118 @@ class scicrunch():
         if crawl:
             return self.crawl_get(urls)
 
-        async def get_single(url, session, auth):
-            async with session.get(url) as response:
-                if response.status not in [200, 201]:
-                    try:
-                        output = await response.json()
-                    except:
-                        output = await response.text()
-                    problem = str(output)
-                    exit(
-                        str(problem) + ' with status code [' +
-                        str(response.status) + ']')
-                output = await response.json(content_type=None)
-                try:
-                    try:
-                        output = {
-                            int(output['data']['id']): output['data']
-                        }  # terms
-                    except:
-                        output = {
-                            int(output['data'][0]['tid']): output['data']
-                        }  # annotations
-                except:
-                    print('Not able to get output')
-                    exit(output)
-                return output
-
-        async def get_all(urls, connector, loop):
-            if _print:
-                print('=== {0} ==='.format(action))
-            tasks = []
-            auth = BasicAuth('scicrunch', 'perl22(query)')
-            async with ClientSession(
-                    connector=connector, loop=loop, auth=auth) as session:
-                for i, url in enumerate(urls):
-                    task = asyncio.ensure_future(get_single(url, session, auth))
-                    tasks.append(task)
-                return (await asyncio.gather(*tasks))
-
-        connector = TCPConnector(
-            limit=LIMIT
-        )  # rate limiter; should be between 20 and 80; 100 maxed out server
-        loop = asyncio.get_event_loop()  # event loop initialize
-        future = asyncio.ensure_future(
-            get_all(urls, connector, loop))  # tasks to do; data is in json format [{},]
-        outputs = loop.run_until_complete(future)  # loop until done
+        if _print:
+            print('=== {0} ==='.format(action))
+        outputs = self.client.run([self._get_single(url) for url in urls], limit=LIMIT)
         return {k: v for keyval in outputs for k, v in keyval.items()}
 
+    async def _get_single(self, url):
+        status, output = await self.client.request('GET', url)
+        if status not in [200, 201]:
+            raise ValueError(
+                str(output) + ' with status code [' +
+                str(status) + ']')
+        try:
+            try:
+                output = {
+                    int(output['data']['id']): output['data']
+                }  # terms
+            except:
+                output = {
+                    int(output['data'][0]['tid']): output['data']
+                }  # annotations
+        except:
+            raise ValueError('Not able to get output ' + str(output))
+        return output
+
     def post(
         self,
         data: list,
         LIMIT: int = 20,
         action: str = 'Pushing Info',
         _print: bool = True,
-        crawl: bool = False):
+        crawl: bool = False,
+        idempotent: bool = False):
+        """ idempotent posts such as updates are also retried on server
+            errors, everything else is only retried when the connection
+            failed or InterLex could not generate an identifier """
 
         if crawl: return self.crawl_post(data, _print=_print)
 
-        async def post_single(url, data, session, i):
-            # data.update({
-            #     'batch-elastic': 'True'
-            # })  # term should be able to handle it now
-            data = json.dumps({
-                **{'key': self.api_key, },
-                **data,
-            })
-            headers = {'Content-type': 'application/json'}
-
-            limit = 0
-            output = {}
-            while not output and limit < 100:
-
-                async with session.post(url, data=data, headers=headers) as response:
+        if _print:
+            print('=== {0} ==='.format(action))
+        return self.client.run([self._post_single(url, d, i, _print, idempotent)
+                                for i, (url, d) in enumerate(data)], limit=LIMIT)
+
+    @staticmethod
+    def _errormsg(output):
+        if not isinstance(output, dict):
+            return False
+        elif output.get('errormsg'):
+            return output.get('errormsg')
+        elif isinstance(output.get('data'), dict):
+            return output['data'].get('errormsg')
+        return False
+
+    async def _post_single(self, url, data, i, _print, idempotent=False):
+        # data.update({
+        #     'batch-elastic': 'True'
+        # })  # term should be able to handle it now
+        data = json.dumps({
+            **{'key': self.api_key, },
+            **data,
+        })
+        headers = {'Content-type': 'application/json'}
+
+        def retry_when(status, output):
+            if status in [200, 201]:
+                return not output  # allows NoneTypes to pass after retries
+            error = self._errormsg(output)
+            return bool(error) and 'could not generate ILX identifier' in error
+
+        status, output = await self.client.request('POST', url, retry_when=retry_when,
+                                                   idempotent=idempotent,
+                                                   data=data, headers=headers)
+
+        # strict codes due to odd behavior in past
+        if status not in [200, 201]:
+            error = self._errormsg(output)
+            if error:
+                if 'could not generate ILX identifier' in error:
+                    output = None
+                elif 'already exists' in error:
+                    print(error)
+                    output = {'data':{'term':{}}}
+                else:
+                    print('IN CATCH')
+                    problem = str(output)
+                    exit(str(problem) + ' with status code [' +
+                        str(status) + '] with params:' + str(data))
+            else:
+                print('OUT CATCH')
+                problem = str(output)
+                exit(str(problem) + ' with status code [' +
+                    str(status) + '] with params:' + str(data))
 
-                    # strict codes due to odd behavior in past
-                    if response.status not in [200, 201]:
-                        try:
-                            output = await response.json()
-                        except:
-                            output = await response.text()
-
-                        error = False
-                        if output.get('errormsg'):
-                            error = output.get('errormsg')
-                        elif output.get('data').get('errormsg'):
-                            error = output.get('data').get('errormsg')
-                        if error:
-                            if 'could not generate ILX identifier' in error:
-                                output = None
-                            elif 'already exists' in error:
-                                print(error)
-                                output = {'data':{'term':{}}}
-                            else:
-                                print('IN CATCH')
-                                problem = str(output)
-                                exit(str(problem) + ' with status code [' +
-                                    str(response.status) + '] with params:' + str(data))
-                                output = {'data':{'term':{}}}
-                        else:
-                            print('OUT CATCH')
-                            problem = str(output)
-                            exit(str(problem) + ' with status code [' +
-                                str(response.status) + '] with params:' + str(data))
-                            output = {'data':{'term':{}}}
-
-                    # Missing required fields I didn't account for OR Duplicates.
-                    else:
-                        # allows NoneTypes to pass
-                        output = await response.json(content_type=None)
+        # Missing required fields I didn't account for OR Duplicates.
+        elif not output:
+            print(status)
+            output = None
 
-                        if not output:
-                            print(response.status)
-                            output = None
+        # Duplicates
+        elif self._errormsg(output):
+            print(self._errormsg(output))
 
-                        # Duplicates
-                        elif output.get('data').get('errormsg'):
-                            print(output.get('data').get('errormsg'))
-                            # print(response.status)
-                            # print(data) # TODO: its hitting here and idk why
+        if output is None:
+            return None
 
+        if _print:
+            try:
+                print(i, output['data']['label'])
+            except:
+                print(i, output['data'])
 
-            if _print:
-                try:
-                    print(i, output['data']['label'])
-                except:
-                    print(i, output['data'])
-
-            return output['data']
-
-        async def bound_post(sem, url, data, session, i):
-            async with sem:
-                await post_single(url, data, session, i)
-
-        async def post_all(total_data, connector, loop):
-            tasks = []
-            sem = asyncio.Semaphore(50)
-
-            auth = BasicAuth('scicrunch', 'perl22(query)')
-            async with ClientSession(connector=connector, auth=auth) as session:
-                if _print:
-                    print('=== {0} ==='.format(action))
-                for i, tupdata in enumerate(total_data):
-                    url, data = tupdata
-                    task = asyncio.ensure_future(
-                        post_single(url, data, session, i))
-                    tasks.append(task)
-                outputs = await asyncio.gather(*tasks)
-                return outputs
-
-        connector = TCPConnector(
-            limit=LIMIT
-        )  # rate limiter; should be between 20 and 80; 100 maxed out server
-        loop = asyncio.get_event_loop()  # event loop initialize
-        future = asyncio.ensure_future(
-            post_all(data, connector, loop))  # tasks to do; data is in json format [{},]
-        output = loop.run_until_complete(future)  # loop until done
-        return output
+        return output['data']
 
     def identifierSearches(self,
                            ids=None,
@@ -367,6 +473,25 @@ class scicrunch():
         url_base = self.base_url + '/api/1/term/edit/{id}'
         merged_data = []
 
+        if not crawl:
+            # each edit is sent as soon as its own view returns
+            view_base = self.base_url + '/api/1/term/view/{id}' + '?key=' + self.api_key
+
+            async def update_one(i, d):
+                old = (await self._get_single(view_base.format(id=str(d['id']))))[int(d['id'])]
+                if d['ilx'] != old['ilx']:
+                    print(d['ilx'], old['ilx'])
+                    exit('You might be using beta insead of production!')
+
+                merged = scicrunch_client_helper.merge(new=d, old=old)
+                merged = scicrunch_client_helper.superclasses_bug_fix(merged)
+                return await self._post_single(url_base.format(id=str(d['id'])), merged, i, _print,
+                                               idempotent=True)
+
+            if _print:
+                print('=== Updating Terms ===')
+            return self.client.run([update_one(i, d) for i, d in enumerate(data)], limit=LIMIT)
+
         # PHP on the server is is LOADED with bugs. Best to just duplicate entity data and change
         # what you need in it before re-upserting the data.
         old_data = self.identifierSearches(
@@ -429,6 +554,27 @@ class scicrunch():
             #d['batch-elastic'] = 'True' # term/add and edit should be ready now
             terms.append((url_base, d))
 
+        if not crawl:
+            # each term is added as soon as its own ilx id has been primed
+            add_url = self.base_url + '/api/1/term/add'
+
+            async def add_one(i, d):
+                primer_response = await self._post_single(url_base, d, i, _print)
+                d['label'] = d.pop('term')
+                d = scicrunch_client_helper.superclasses_bug_fix(d)
+                ilx_id = primer_response and (primer_response.get('ilx') or
+                                              primer_response.get('fragment'))
+                if not ilx_id:  # errored term
+                    return None
+                d.update({'ilx': ilx_id})
+                return await self._post_single(add_url, d, i, _print)
+
+            if _print:
+                print('=== Priming and Adding Terms ===')
+            outputs = self.client.run([add_one(i, d) for i, (_, d) in enumerate(terms)],
+                                      limit=LIMIT)
+            return [o for o in outputs if o is not None]
+
         primer_responses = self.post(
             terms,
             action='Priming Terms',
@@ -555,7 +701,8 @@ class scicrunch():
                   LIMIT=LIMIT,
                   action='Updating Annotations',
                   _print=_print,
-                  crawl=crawl)
+                  crawl=crawl,
+                  idempotent=True)
 
     def deleteAnnotations(self,
                           annotation_ids,
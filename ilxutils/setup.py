@@ -27,6 +27,7 @@ setup(
     	'asyncio',
     	'sqlalchemy',
         'pathlib',
+        'ttlser>=1.1.0',
     ],
     entry_points={
         'console_scripts': [
@@ -0,0 +1,79 @@
+import json
+import tempfile
+import threading
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from ilxutils.elastic_search import ElasticSearch
+
+
+class FakeElastic(BaseHTTPRequestHandler):
+    """ just enough of _mget, ids ending in an even digit exist """
+
+    requests = []
+    lock = threading.Lock()
+
+    def do_POST(self):
+        ids = json.loads(self.rfile.read(int(self.headers['Content-Length'])))['ids']
+        with self.lock:
+            self.requests.append((self.path, ids))
+
+        docs = [{'_id': i, 'found': True, '_source': {'ilx': i}}
+                if int(i[-1]) % 2 == 0 else
+                {'_id': i, 'found': False}
+                for i in ids]
+        out = json.dumps({'docs': docs}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(out)
+
+    def log_message(self, *args):
+        pass
+
+
+class Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class TestElasticSearch:
+
+    def setup(self):
+        self.server = Server(('127.0.0.1', 0), FakeElastic)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.dir = tempfile.TemporaryDirectory()
+        user, password = Path(self.dir.name, 'user.txt'), Path(self.dir.name, 'password.txt')
+        user.write_text('elastic')
+        password.write_text('test')
+        self.es = ElasticSearch(user=user.as_posix(), password=password.as_posix())
+        self.es.base_url = 'http://127.0.0.1:{}/interlex'.format(self.server.server_port)
+        FakeElastic.requests = []
+
+    def teardown(self):
+        self.server.shutdown()
+        self.dir.cleanup()
+
+    def test_chunks(self):
+        ilx_ids = ['ilx_{:07}'.format(i) for i in range(25)]
+        out = self.es.search_by_ilx_ids(ilx_ids, _print=False, chunk_size=10)
+        assert [o and o['ilx'] for o in out] == [i if int(i[-1]) % 2 == 0 else None
+                                                 for i in ilx_ids]
+        assert all(path == '/interlex/term/_mget' for path, _ in FakeElastic.requests)
+        assert sorted(len(ids) for _, ids in FakeElastic.requests) == [5, 10, 10]
+        assert set(self.es.errors) == {i for i in ilx_ids if int(i[-1]) % 2}
+        assert set(self.es.errors.values()) == {'not found'}
+
+    def test_fix_ilx_and_cache(self):
+        cache = {'ilx_0000002': {'ilx': 'cached'}}
+        out = self.es.search_by_ilx_ids(['0000002', 'ilx_0000004', '0000004', 1],
+                                        _print=False, cache=cache)
+        assert out == [{'ilx': 'cached'}, {'ilx': 'ilx_0000004'}, {'ilx': 'ilx_0000004'}, None]
+        assert [ids for _, ids in FakeElastic.requests] == [['ilx_0000004', 'ilx_1']]
+        assert 'ilx_0000004' in cache and 'ilx_1' not in cache
+
+        FakeElastic.requests = []
+        debug = self.es.search_by_ilx_ids(['ilx_0000004', 'ilx_1'], _print=False,
+                                          debug=True, cache=cache)
+        assert FakeElastic.requests == [('/interlex/term/_mget', ['ilx_1'])]
+        assert debug == [{'success': 'ilx_0000004'},
+                         {'failed': 'ilx_1', 'error': 'not found'}]
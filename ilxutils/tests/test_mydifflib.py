@@ -0,0 +1,25 @@
+from ilxutils.mydifflib import NgramIndex, ratio
+
+
+class TestNgramIndex:
+
+    def setup(self):
+        self.labels = ['Purkinje cell', 'purkinje cell layer', 'granule cell',
+                       'cerebellar cortex', 'cerebral cortex', 'brain']
+        self.index = NgramIndex()
+        for i, label in enumerate(self.labels):
+            self.index.add(label, 'ilx_' + str(i))
+
+    def test_exact(self):
+        score, string, values = self.index.search(' BRAIN ')[0]
+        assert (score, string, values) == (1.0, 'brain', ['ilx_5'])
+
+    def test_matches_brute_force(self):
+        for query in ['purkinje cells', 'cerebelar cortex', 'granular cell', 'brains']:
+            expect = max(self.index.strings, key=lambda s: ratio(query, s))
+            assert self.index.search(query, threshold=.5)[0][1] == expect
+
+    def test_search_many(self):
+        results = self.index.search_many(['Brain', 'brain', 'liver'])
+        assert results[0] == results[1]
+        assert results[2] == []
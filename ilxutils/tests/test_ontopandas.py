@@ -0,0 +1,38 @@
+import rdflib
+from rdflib import RDF, RDFS, OWL, BNode, Literal, URIRef
+from ilxutils.ontopandas import OntoPandas
+
+ex = rdflib.Namespace('http://example.org/')
+
+
+class TestOntoPandas:
+
+    def setup(self):
+        self.g = rdflib.Graph()
+        self.g.bind('ex', ex)
+        self.g.bind('owl', OWL)
+        for i in range(3):
+            self.g.add((ex[str(i)], RDF.type, OWL.Class))
+            self.g.add((ex[str(i)], RDFS.label, Literal('term {}'.format(i))))
+
+        self.g.add((ex['1'], RDFS.subClassOf, ex['0']))
+        self.g.add((ex['1'], ex.synonym, Literal('one')))
+        self.g.add((ex['1'], ex.synonym, Literal('uno')))
+        self.g.add((ex['2'], RDFS.subClassOf, BNode()))  # restrictions are skipped
+        self.g.add((BNode(), RDF.type, OWL.Class))
+        self.g.add((ex['3'], RDFS.label, Literal('not a class')))
+
+    def test_store_dataframe(self):
+        df = OntoPandas(self.g, qnamed=True, str_vals=True).df.set_index('iri')
+        assert list(df.index) == [str(ex['0']), str(ex['1']), str(ex['2'])]
+        assert sorted(df.columns) == ['ex:synonym', 'rdf:type', 'rdfs:label', 'rdfs:subClassOf']
+        assert df.loc[str(ex['1']), 'rdfs:subClassOf'] == str(ex['0'])
+        assert df.loc[str(ex['2']), 'rdfs:subClassOf'] is None
+        assert sorted(df.loc[str(ex['1']), 'ex:synonym']) == ['one', 'uno']
+        assert df.loc[str(ex['0']), 'rdfs:label'] == 'term 0'
+
+    def test_terms(self):
+        df = OntoPandas(self.g).df.set_index('iri')
+        assert isinstance(df.index[0], URIRef)
+        assert df.loc[ex['0'], RDF.type] == OWL.Class
+        assert isinstance(df.loc[ex['0'], RDFS.label], Literal)
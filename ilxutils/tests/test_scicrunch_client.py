@@ -0,0 +1,129 @@
+import json
+import threading
+from itertools import count
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from ilxutils.scicrunch_client import scicrunch, AsyncClient
+from aiohttp import BasicAuth
+
+
+class FakeInterLex(BaseHTTPRequestHandler):
+    """ just enough of the InterLex api for add and update, every third
+        request fails with a 503 the first time it is seen """
+
+    terms = {}
+    ids = count(1)
+    seen = set()
+    unavailable = []
+    fail_edits = set()
+    lock = threading.Lock()
+
+    def reply(self, status, body):
+        out = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(out)
+
+    def flaky(self, key):
+        with self.lock:
+            if key in self.seen or hash(key) % 3:
+                return False
+            self.seen.add(key)
+            return True
+
+    def do_GET(self):
+        id = int(self.path.split('/')[-1].split('?')[0])
+        if self.flaky(('GET', self.path)):
+            return self.reply(503, {})
+        self.reply(200, {'data': self.terms[id]})
+
+    def do_POST(self):
+        data = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        if self.path.endswith('/unavailable'):
+            self.unavailable.append(data)
+            return self.reply(503, {})
+
+        data.pop('key')
+        if self.flaky(('POST', self.path, json.dumps(data, sort_keys=True))):
+            return self.reply(400, {'errormsg': 'could not generate ILX identifier'})
+
+        if self.path.endswith('/ilx/add'):
+            self.reply(200, {'data': {'term': data['term'], 'ilx': 'tmp_' + data['term']}})
+        elif self.path.endswith('/term/add'):
+            with self.lock:
+                id = next(self.ids)
+                iri = 'http://uri.interlex.org/base/' + data['ilx']
+                existing = [{'curie': 'ILX:' + data['ilx'], 'iri': iri, 'preferred': '1'}]
+                self.terms[id] = {'synonyms': [], 'existing_ids': existing, 'superclasses': [],
+                                  **data, 'id': str(id)}
+            self.reply(200, {'data': self.terms[id]})
+        else:
+            id = int(self.path.split('/')[-1])
+            with self.lock:
+                failed = id in self.fail_edits
+                self.fail_edits.discard(id)
+            if failed:
+                return self.reply(503, {})
+            self.terms[id].update(data)
+            self.reply(200, {'data': self.terms[id]})
+
+    def log_message(self, *args):
+        pass
+
+
+class Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class TestScicrunchClient:
+
+    def setup(self):
+        self.server = Server(('127.0.0.1', 0), FakeInterLex)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = 'http://127.0.0.1:{}'.format(self.server.server_port)
+        client = AsyncClient(auth=BasicAuth('scicrunch', 'test'), limit=8, backoff=.001)
+        self.sci = scicrunch(api_key='fake', base_url=self.base_url, client=client)
+        FakeInterLex.unavailable = []
+        FakeInterLex.fail_edits = set()
+
+    def teardown(self):
+        self.sci.close()
+        self.server.shutdown()
+
+    def test_add_then_update(self):
+        labels = ['term {}'.format(i) for i in range(30)]
+        added = self.sci.addTerms([{'label': l, 'type': 'term'} for l in labels], _print=False)
+        assert sorted(a['label'] for a in added) == sorted(labels)
+        assert all(a['ilx'] == 'tmp_' + a['label'] for a in added)
+
+        updates = [{'id': a['id'], 'ilx': a['ilx'], 'definition': 'updated'} for a in added]
+        updated = self.sci.updateTerms(updates, _print=False)
+        assert [u['id'] for u in updated] == [a['id'] for a in added]
+        assert all(u['definition'] == 'updated' for u in updated)
+
+        stats = self.sci.client.stats()
+        assert stats['retries'] > 0, 'the fake api should have forced retries'
+        assert stats['requests'] == 30 * 4 + stats['retries']
+        assert stats['p50'] <= stats['p99']
+
+    def test_retry_idempotent_only(self):
+        client = self.sci.client
+        url = self.base_url + '/api/1/unavailable'
+        status, _ = client.run([client.request('POST', url, json={'label': 'add'},
+                                               idempotent=False)])[0]
+        assert status == 503
+        assert len(FakeInterLex.unavailable) == 1, 'adds must not be repeated on 5xx'
+
+        client.run([client.request('POST', url, json={'label': 'update'})])
+        assert len(FakeInterLex.unavailable) == 1 + 1 + client.retries
+
+    def test_update_retried(self):
+        added = self.sci.addTerms([{'label': 'retried', 'type': 'term'}], _print=False)
+        FakeInterLex.fail_edits = {int(added[0]['id'])}
+        retries = self.sci.client.stats()['retries']
+        updated = self.sci.updateTerms([{'id': added[0]['id'], 'ilx': added[0]['ilx'],
+                                         'definition': 'updated'}], _print=False)
+        assert updated[0]['definition'] == 'updated'
+        assert not FakeInterLex.fail_edits, 'the edit should have hit the 503'
+        assert self.sci.client.stats()['retries'] > retries
@@ -2,6 +2,8 @@
 import os
 import sys
 import atexit
+import pickle
+import hashlib
 import inspect
 from pprint import pformat
 from pathlib import Path, PurePath as PPath
@@ -748,6 +750,70 @@ class Config:
             #self.load_graph = module.config.load_graph
             #graphBase.load_graph = self.load_graph
 
+    def write_compiled(self):
+        graphBase.write_compiled()
+
+    def load_compiled(self, fallback=True):
+        """ Load neurons from the binary snapshot if it is current with the
+            turtle source. If it is missing or stale and fallback is True
+            then load_existing is used and the snapshot is refreshed.
+            Returns True if the snapshot was used. """
+        try:
+            next(iter(self.neurons()))
+            raise self.ExistingNeuronsError('Existing neurons detected. Please '
+                                            'load from file before creating neurons!')
+        except StopIteration:
+            pass
+
+        if graphBase.ignore_existing:
+            return False
+
+        if graphBase.config is not self:
+            raise self.NotCurrentConifgError('This config is not the active config!')
+
+        snapshot = graphBase.read_compiled()
+        if snapshot is None:
+            if fallback:
+                self.load_existing()
+                if (self.neurons() and
+                    Path(graphBase.filename_compiled()).parent.exists()):
+                    graphBase.write_compiled()
+
+            return False
+
+        triples, records = snapshot
+        self.load_graph = rdflib.Graph()
+        for t in triples:
+            self.load_graph.add(t)
+
+        graphBase.load_graph = self.load_graph
+        _ = [graphBase.in_graph.add(t) for t in graphBase.load_graph]  # same as load_existing
+
+        pheno_types = {c.__name__:c for c in (Phenotype, LogicalPhenotype,
+                                              *subclasses(Phenotype),
+                                              *subclasses(LogicalPhenotype))}
+        def decode(record):
+            type_name, first, rest = record
+            ptype = pheno_types[type_name]
+            if issubclass(ptype, LogicalPhenotype):
+                return ptype(first, *(decode(r) for r in rest))
+            else:
+                return ptype(first, rest, check=False)
+
+        classes = {c.owlClass:c for c in graphBase.python_subclasses}
+        NeuronBase._loading = True  # block other loading and redefinition warnings
+        try:
+            for type_name, owlClass, id_, label, pes in records:
+                if owlClass not in classes:  # ebms that only exist in the turtle
+                    classes[owlClass] = type(type_name, (NeuronCUT,), dict(owlClass=owlClass))
+                    graphBase.knownClasses.append(owlClass)
+
+                classes[owlClass](*(decode(r) for r in pes), id_=id_, label=label, override=True)
+        finally:
+            NeuronBase._loading = False
+
+        return True
+
 # the monstrosity
 
 class graphBase:
@@ -760,6 +826,7 @@ class graphBase:
     LocalNames = {}
 
     _registered = False
+    _compiled_version = 2
 
     __import_name__ = __name__
 
@@ -1093,6 +1160,76 @@ class graphBase:
         with open(graphBase.filename_python(), 'wt') as f:
             f.write(python)
 
+    @staticmethod
+    def filename_compiled():
+        return PPath(graphBase.filename_python()).with_suffix('.pickle').as_posix()
+
+    @staticmethod
+    def source_hash():
+        """ sha256 of the turtle file that the compiled snapshot is keyed on """
+        ogp = Path(graphBase.ng.filename)
+        if ogp.exists():
+            with open(ogp, 'rb') as f:
+                return hashlib.sha256(f.read()).hexdigest()
+
+    @staticmethod
+    def write_compiled():
+        """ Write a binary snapshot of the current neurons, their phenotypes
+            and ids along with every triple in the turtle file. The snapshot is
+            keyed on the hash of the turtle file so it must be written after
+            the turtle has been written. """
+        source_hash = graphBase.source_hash()
+        if source_hash is None:
+            raise FileNotFoundError(f'No turtle file at {graphBase.ng.filename} '
+                                    'call write() before write_compiled()')
+
+        def encode(pe):
+            if isinstance(pe, LogicalPhenotype):
+                return pe.__class__.__name__, pe.op, tuple(encode(p) for p in pe.pes)
+            else:
+                return pe.__class__.__name__, pe.p, pe.e
+
+        neurons = graphBase.neurons()
+        # everything load_existing would put in load_graph and in_graph
+        triples = tuple(rdflib.Graph().parse(graphBase.ng.filename, format='turtle'))
+        records = tuple((n.__class__.__name__,
+                         n.owlClass,
+                         (n.id_ if not hasattr(n, 'temp_id') or
+                          n.id_ != n.temp_id else None),
+                         n._origLabel,
+                         tuple(encode(pe) for pe in n.pes))
+                        for n in neurons)
+
+        header = graphBase._compiled_version, source_hash
+        with open(graphBase.filename_compiled(), 'wb') as f:
+            pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump((triples, records),
+                        f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def read_compiled():
+        """ Return the body of the compiled snapshot if it is current
+            with the turtle source, otherwise return None. """
+        path = Path(graphBase.filename_compiled())
+        if not path.exists():
+            return
+
+        with open(path, 'rb') as f:
+            try:
+                version, source_hash = pickle.load(f)
+                if version != graphBase._compiled_version:
+                    log.info(f'compiled snapshot version {version} != '
+                             f'{graphBase._compiled_version} for {path}')
+                    return
+
+                if source_hash != graphBase.source_hash():
+                    log.info(f'compiled snapshot is stale for {graphBase.ng.filename}')
+                    return
+
+                return pickle.load(f)
+            except (pickle.UnpicklingError, EOFError, ValueError, TypeError) as e:
+                log.warning(f'could not read compiled snapshot {path} {e}')
+
     @classmethod
     def python_header(cls):
         out = '#!/usr/bin/env python3.6\n'
@@ -1893,7 +2030,8 @@ class NeuronBase(AnnotationMixin, GraphOpsMixin, graphBase):
         if id_ and phenotypeEdges:
             self.id_ = self.expand(id_)
             #print('WARNING: you may be redefining a neuron!')
-            log.warning(f'you may be redefining a neuron! {id_}')
+            if not self._loading:
+                log.warning(f'you may be redefining a neuron! {id_}')
             #raise TypeError('This has not been implemented yet. This could serve as a way to validate a match or assign an id manually?')
         elif id_:
             self.id_ = self.expand(id_)
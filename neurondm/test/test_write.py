@@ -2,6 +2,8 @@ import os
 import unittest
 from pathlib import Path
 import pytest
+import rdflib
+from rdflib.compare import isomorphic
 from git import Repo
 
 testing_base = f'/tmp/.neurons-testing-base-{os.getpid()}'
@@ -56,3 +58,28 @@ class TestWrite(unittest.TestCase):
         config2 = Config('test-write-after-other', ttl_export_dir=tel, py_export_dir=pyel)
         Neuron(Phenotype('TEMP:after-other'))
         config2.write_python()
+
+    def test_3_compiled_roundtrip(self):
+        from neurondm import Config, Neuron, Phenotype
+        config = Config('test-compiled', ttl_export_dir=tel, py_export_dir=pyel)
+        Neuron(Phenotype('TEMP:compiled'))
+        config.write()
+        config.write_compiled()
+        neurons = config.neurons()
+
+        config2 = Config('test-compiled', ttl_export_dir=tel, py_export_dir=pyel)
+        assert config2.load_compiled()
+        assert config2.neurons() == neurons
+
+        from neurondm.core import graphBase
+        compiled = rdflib.Graph()
+        _ = [compiled.add(t) for t in graphBase.in_graph]
+        config4 = Config('test-compiled', ttl_export_dir=tel, py_export_dir=pyel)
+        config4.load_existing()
+        existing = rdflib.Graph()
+        _ = [existing.add(t) for t in graphBase.in_graph]
+        assert isomorphic(compiled, existing)
+
+        Path(config2.out_graph_path()).write_text('# stale\n', encoding='utf-8')
+        config3 = Config('test-compiled', ttl_export_dir=tel, py_export_dir=pyel)
+        assert not config3.load_compiled(fallback=False)
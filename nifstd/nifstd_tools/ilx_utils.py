@@ -175,11 +175,9 @@ def writeGraph(graph, target_graph, temp_ids_ids):
     graph.add_known_namespaces('ILX')
     target_graph.add_known_namespaces(*(prefix for prefix in graph.namespaces
                                         if prefix != 'ILXREPLACE'))
-    subjects = []
-    for temp_id, id_ in temp_ids_ids:
-        graph.replace_uriref(temp_id, id_)
-        s = graph.expand(id_)
-        subjects.append(s)
+    temp_ids_ids = list(temp_ids_ids)
+    graph.replace_urirefs(dict(temp_ids_ids))
+    subjects = [graph.expand(id_) for _, id_ in temp_ids_ids]
     for s in subjects:  # prevent half replaced triples from insertion
         for p, o in graph.g.predicate_objects(s):
             target_graph.add_recursive((s, p, o), graph)
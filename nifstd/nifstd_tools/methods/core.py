@@ -8,7 +8,7 @@ from pyontutils.namespaces import prot, proc, tech, asp, dim, unit
 from pyontutils.combinators import oc, oc_, odp, oop, olit, oec
 from pyontutils.combinators import POCombinator, ObjectCombinator
 from pyontutils.combinators import propertyChainAxiom, Combinator, Restriction2, EquivalentClass
-from pyontutils.combinators import restriction, restrictions, intersectionOf
+from pyontutils.combinators import restriction, restrictions, intersectionOf, Templates
 from pyontutils.closed_namespaces import owl, rdf, rdfs
 
 
@@ -35,6 +35,7 @@ owlClassC = oc_.full_combinator
 subClassOf = POCombinator(rdfs.subClassOf, ObjectCombinator).full_combinator
 oop_ = POCombinator(rdf.type, owl.ObjectProperty)
 
+@Templates
 def _t(subject, label, *rests, def_=None, synonyms=tuple(), comment=None,
        equivalentClass=oec):
     members = tuple()
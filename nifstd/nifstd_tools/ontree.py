@@ -76,16 +76,62 @@ def time():
 
 
 class ImportChain:  # TODO abstract this a bit to support other onts, move back to pyontutils
-    def __init__(self, sgg=sgg, sgc=sgc, wasGeneratedBy='FIXME#L{line}'):
+    cache_base = Path('~/.cache/pyontutils').expanduser()
+    max_age = 24 * 60 * 60  # seconds before load_html recomputes the cached html
+    retry_after = 5 * 60  # seconds before retrying a failed build, doubles up to max_age
+    bulk_query = ('MATCH (sub)-[:isDefinedBy]->(obj) WHERE (sub:Ontology) '
+                  'RETURN DISTINCT sub.iri AS sub, obj.iri AS obj')
+
+    def __init__(self, sgg=sgg, sgc=sgc, wasGeneratedBy='FIXME#L{line}', cache=None,
+                 max_age=None):
         self.sgg = sgg
         self.sgc = sgc
         self.wasGeneratedBy = wasGeneratedBy
+        if cache is None:
+            # one cache per endpoint so that switching SciGraph instances
+            # never serves the import chain of another instance
+            endpoint = re.sub(r'[^\w.]+', '-', sgg._basePath.split('://', 1)[-1]).strip('-')
+            cache = self.cache_base / f'ontree-import-chain-{endpoint}.html'
+
+        self.cache = Path(cache)
+        if max_age is not None:
+            self.max_age = max_age
+
+        self.html = ''
+        self.made = None  # timestamp of self.html
+        self.failed = None  # timestamp of the last failed build
+        self.retry_delay = self.retry_after
 
     def get_scigraph_onts(self):
         self.results = self.sgc.execute('MATCH (n:Ontology) RETURN n', 1000)
         return self.results
 
+    def get_itrips_bulk(self):
+        """ all import edges in a single cypher query, None if the
+            endpoint does not return rows we understand """
+        try:
+            rows = self.sgc.execute(self.bulk_query, 100000, 'application/json')
+        except ConnectionError as e:
+            log.exception(e)
+            return
+
+        if not isinstance(rows, list) or not all(isinstance(r, dict) and
+                                                 'sub' in r and 'obj' in r
+                                                 for r in rows):
+            return
+
+        self.itrips = sorted(set((rdflib.URIRef(OntId(r['obj']).iri),
+                                  rdflib.URIRef(OntId('owl:imports').iri),
+                                  rdflib.URIRef(OntId(r['sub']).iri))
+                                 for r in rows))
+        return self.itrips
+
     def get_itrips(self):
+        itrips = self.get_itrips_bulk()
+        if itrips is not None:
+            return itrips
+
+        log.warning('bulk import query failed, falling back to one query per ontology')
         results = self.get_scigraph_onts()
         iris = sorted(set(r['iri'] for r in results))
         gin = lambda i: (i, self.sgg.getNeighbors(i, relationshipType='isDefinedBy',
@@ -111,22 +157,59 @@ class ImportChain:  # TODO abstract this a bit to support other onts, move back
         return self.tree, self.extra
 
     def make_html(self):
+        """ compute the html, on failure the last good html is kept and
+            the time is recorded so that load_html can back off """
         line = getSourceLine(self.__class__)
         wgb = self.wasGeneratedBy.format(line=line)
         prov = makeProv('owl:imports', 'NIFTTL:nif.ttl', wgb)
-        tree, extra  = self.make_import_chain()
+        try:
+            tree, extra  = self.make_import_chain()
+        except Exception as e:  # scigraph is down, keep serving what we have
+            log.exception(e)
+            tree = None
+
+        now = datetime.now().timestamp()
         if tree is None:
-            html_all = ''
-        else:
-        
-            html = extra.html.replace('NIFTTL:', '')
-            html_all = hfn.htmldoc(html,
-                                   other=prov,
-                                   styles=hfn.tree_styles)
+            if self.failed is not None:
+                self.retry_delay = min(self.retry_delay * 2, self.max_age)
+
+            self.failed = now
+            return ''
+
+        html = extra.html.replace('NIFTTL:', '')
+        html_all = hfn.htmldoc(html,
+                               other=prov,
+                               styles=hfn.tree_styles)
+
+        self.html, self.made = html_all, now
+        self.failed, self.retry_delay = None, self.retry_after
+        self.cache.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.cache, 'wt') as f:
+            f.write(html_all)
 
-        self.html = html_all
         return html_all
 
+    def load_html(self):
+        """ the html from memory or the disk cache if it is younger than
+            max_age, otherwise compute it unless the last attempt failed
+            less than retry_delay ago, in which case the last good html
+            is returned, stale or not """
+        now = datetime.now().timestamp()
+        if self.made is not None and now - self.made < self.max_age:
+            return self.html
+        elif self.failed is not None and now - self.failed < self.retry_delay:
+            return self.html
+        elif self.made is None and self.cache.exists():
+            made = self.cache.stat().st_mtime
+            with open(self.cache, 'rt') as f:
+                self.html = f.read()
+
+            self.made = made
+            if now - made < self.max_age:
+                return self.html
+
+        return self.make_html() or self.html
+
     def write_import_chain(self, location='/tmp/'):
         html = self.make_html()
         if not html:
@@ -393,7 +476,7 @@ def server(api_key=None, verbose=False):
     wgb = wasGeneratedBy.format(line=line)
 
     importchain = ImportChain(wasGeneratedBy=wasGeneratedBy)
-    importchain.make_html()  # run this once, restart services on a new release
+    importchain.load_html()  # on a new release POST to imports/chain/refresh
 
     loop = asyncio.get_event_loop()
     app = Flask('ontology tree service')
@@ -503,7 +586,12 @@ def server(api_key=None, verbose=False):
 
     @app.route(f'/{basename}/imports/chain', methods=['GET'])
     def route_import_chain():
-        return importchain.html
+        return importchain.load_html()  # recomputed once max_age has passed
+
+    @app.route(f'/{basename}/imports/chain/refresh', methods=['POST'])
+    def route_import_chain_refresh():
+        importchain.make_html()
+        return redirect(url_for('route_import_chain'))
 
     @app.route(f'/{basename}/query/<pred>/<root>', methods=['GET'])
     def route_query(pred, root):
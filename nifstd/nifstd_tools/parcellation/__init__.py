@@ -7,7 +7,7 @@ Usage:
 
 Options:
     -f --fail                   fail loudly on common common validation checks
-    -j --jobs=NJOBS             number of parallel jobs to run [default: 9]
+    -j --jobs=NJOBS             number of parallel jobs to run [default: 0] 0 uses all cores
     -l --local                  only build files with local source copies
     -s --stats                  generate report on current parcellations
 
@@ -17,11 +17,13 @@ import os
 import re
 import csv
 import glob
+import pickle
+import hashlib
 from pathlib import Path
 from collections import defaultdict, Counter
 from git import Repo
 from lxml import etree
-from rdflib import Graph, URIRef, Namespace
+from rdflib import Graph, URIRef, Literal, Namespace
 from ttlser import natsort
 from pyontutils.core import Class, Source, resSource, ParcOnt, LabelsBase, Collector
 from pyontutils.core import makeGraph, build, relative_resources
@@ -674,6 +676,78 @@ class parcBridge(ParcOnt):
                 yield subclass()
 
 
+#
+# Source ingestion (xml label tables)
+
+xml_cache = Path('~/.cache/pyontutils/parcellation').expanduser()
+_xml_cache_version = 1
+
+
+def parse_fsl_atlas(path):
+    """ name, shortname or None, and (index, label) pairs from an fsl atlas xml file """
+    name = shortname = None
+    labels = []
+    for event, elem in etree.iterparse(path, events=('end',), tag=('name', 'shortname', 'label')):
+        if elem.tag == 'label':
+            labels.append((elem.get('index'), elem.text))
+            elem.clear()
+        elif next(elem.iterancestors('header'), None) is not None:
+            if elem.tag == 'name' and name is None:
+                name = elem.text
+            elif elem.tag == 'shortname' and shortname is None:
+                shortname = elem.text
+
+    return name, shortname, labels
+
+
+def parse_ilf(path):
+    """ (id, name, abbrev, parent id) for the labels of structures in an ilf file in document order """
+    records = []
+    for event, elem in etree.iterparse(path, events=('start',), tag='label'):
+        parent = elem.getparent()
+        if parent.tag == 'structure':
+            parent_id = None
+        elif parent.tag == 'label' and next(elem.iterancestors('structure'), None) is not None:
+            parent_id = parent.get('id')
+        else:
+            continue
+
+        records.append((elem.get('id'), elem.get('name'), elem.get('abbreviation'), parent_id))
+
+    return records
+
+
+def ingest_xml(paths, parser, n_jobs=None):
+    """ Parse independent xml files concurrently, results are cached
+        by parser and file hash so unchanged files are never reparsed. """
+    paths = [Path(p) for p in paths]
+    keys = [hashlib.sha256(p.read_bytes()).hexdigest() for p in paths]
+    cache = xml_cache / f'{parser.__name__}-{_xml_cache_version}'
+    results = {}
+    for key in keys:
+        cached = cache / (key + '.pickle')
+        if key not in results and cached.exists():
+            with open(cached, 'rb') as f:
+                results[key] = pickle.load(f)
+
+    todo = {k:p for k, p in zip(keys, paths) if k not in results}
+    if len(todo) > 1 and n_jobs != 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            futures = {k:executor.submit(parser, p.as_posix()) for k, p in todo.items()}
+            parsed = {k:f.result() for k, f in futures.items()}
+    else:
+        parsed = {k:parser(p.as_posix()) for k, p in todo.items()}
+
+    if parsed:
+        cache.mkdir(parents=True, exist_ok=True)
+        for key, result in parsed.items():
+            with open(cache / (key + '.pickle'), 'wb') as f:
+                pickle.dump(result, f)
+
+    results.update(parsed)
+    return [results[k] for k in keys]
+
+
 #
 # Sources (input files)
 
@@ -1175,6 +1249,8 @@ class PaxLabels(LabelsBase):
     _fixes = []
     _dupes = {}
     _merge = {}
+    _records = None  # per instance cache, sources are modified in place by records
+    _iri_index = None  # (abbrev, label or synonym) -> {iri, ...} filled by _triples
 
     @property
     def fixes_abbrevs(self):
@@ -1252,28 +1328,34 @@ class PaxLabels(LabelsBase):
 
                 self._prov_dict[t].append((predicate, artifact))
 
-    def _makeIriLookup(self):
-        # FIXME need to validate that we didn't write the graph first...
-        g = Graph().parse(self._graph.filename, format='turtle')
-        ids = [s for s in g.subjects(rdf.type, owl.Class) if self.namespace in s]
-        index0 = Label.propertyMapping['abbrevs'],
-        index1 = Label.propertyMapping['label'], Label.propertyMapping['synonyms']
-        out = {}
-        for i in ids:
-            for p0 in index0:
-                for o0 in g.objects(i, p0):
-                    for p1 in index1:
-                        for o1 in g.objects(i, p1):
-                            key = o0, o1
-                            value = i
-                            if key in out:
-                                raise KeyError(f'Key {key} already in output!')
-                            out[key] = value
-        return out
+    def _index_iri(self, iri, abbrevs, labels):
+        for abbrev in abbrevs:
+            for label in labels:
+                key = Literal(abbrev), Literal(label)
+                if key not in self._iri_index:
+                    self._iri_index[key] = set()
+
+                self._iri_index[key].add(iri)
+
+    def lookup_iri(self, abbrev, label):
+        """ the iri for an abbrev and a label or synonym, raises a KeyError
+            if none or more than one iri was generated for the pair """
+        if self._iri_index is None:
+            self()  # the index is filled as the graph is populated
+
+        key = Literal(abbrev), Literal(label)
+        iris = self._iri_index[key]
+        if len(iris) > 1:
+            raise KeyError(f'Key {key} already in output!')
+
+        iri, = iris
+        return iri
 
     def _triples(self):
         self._prov_dict = {}
+        self._iri_index = {}
         combined_record, struct_prov, _, abbrev_prov = self.records()
+        struct_prov = {k:list(v) for k, v in struct_prov.items()}  # don't extend the cache
         for k, v in self.fixes_prov.items():
             if k in struct_prov:
                 struct_prov[k].extend(v)
@@ -1285,6 +1367,7 @@ class PaxLabels(LabelsBase):
             iri = self.namespace[str(i + 1)]  # TODO load from existing
             struct = structure if structure else 'zzzzzz'
             self._prov(iri, abrv, struct, struct_prov, extras, alts, abbrev_prov)
+            self._index_iri(iri, (abrv, *alts), (struct, *extras))
             yield from Label(labelRoot=self.root,
                              #ifail='i fail!',  # this indeed does fail
                              label=struct,
@@ -1321,6 +1404,14 @@ class PaxLabels(LabelsBase):
         return self
 
     def records(self):
+        """ combined_record, struct_prov, collisions, abbrev_prov
+            computed once per instance """
+        if self._records is None:
+            self._records = self._make_records()
+
+        return self._records
+
+    def _make_records(self):
         combined_record = {}
         struct_prov = {}
         collisions = {}
@@ -1730,20 +1821,16 @@ class FSL(LabelsBase):
             'Mars Parietal connectivity-based parcellation':'PCBP',
         }
 
-        for xmlfile in glob.glob(ATLAS_PATH + '*.xml'):
+        xmlfiles = sorted(glob.glob(ATLAS_PATH + '*.xml'))
+        for xmlfile, (parcellation_name, shortname, labels) in zip(
+                xmlfiles, ingest_xml(xmlfiles, parse_fsl_atlas)):
             filename = os.path.splitext(os.path.basename(xmlfile))[0]
 
-            tree = etree.parse(xmlfile)
-            parcellation_name = tree.xpath('header//name')[0].text
-
             # namespace
             namespace = Namespace(FSLATS[filename + '/labels/'])
 
             # shortname
-            shortname = tree.xpath('header//shortname')
-            if shortname:
-                shortname = shortname[0].text
-            else:
+            if shortname is None:
                 shortname = shortnames[parcellation_name]
 
             artifact_shortname = shortname
@@ -1777,12 +1864,8 @@ class FSL(LabelsBase):
 
             # Source
             @classmethod
-            def loadData(cls, _tree=tree):
-                out = []
-                for node in _tree.xpath('data//label'):
-                    index, label = node.get('index'), node.text
-                    out.append((index, label))
-                return out
+            def loadData(cls, _labels=labels):
+                return list(_labels)
 
             source = type('FSLsource_' + shortname.replace(' ', '_'),
                           (Source,),
@@ -1820,10 +1903,11 @@ def main():
     from nifstd_tools.parcellation.berman import Artifacts as bermArts
     onts = getOnts()
     _ = *(print(ont) for ont in onts),
+    jobs = int(args['--jobs'])
     out = build(*onts,
                 parcBridge,
                 fail=args['--fail'],
-                n_jobs=int(args['--jobs']))
+                n_jobs=jobs if jobs > 0 else os.cpu_count())
     if args['--stats']:
         embed()
 
@@ -1,11 +1,11 @@
 import sys
-from lxml import etree
 from pyontutils.core import Source, LabelsBase, Collector, relative_resources
 from pyontutils.utils import Async, deferred
 from pyontutils.namespaces import NIFRID, ilx, ilxtr, WHSSD
 from pyontutils.namespaces import makePrefixes, NCBITaxon, UBERON, nsExact
 from pyontutils.combinators import restriction
 from nifstd_tools.parcellation import parcCore, resSource, LabelRoot, Label, Terminology
+from nifstd_tools.parcellation import ingest_xml, parse_ilf
 from pyontutils.closed_namespaces import rdf, rdfs, owl, dc, dcterms, skos, prov
 from IPython import embed
 
@@ -80,28 +80,12 @@ class WHSSDilfSrc(resSource):
 
     @classmethod
     def loadData(cls):
-        tree = etree.parse(cls.source.as_posix())
-        return tree
+        records, = ingest_xml((cls.source,), parse_ilf)
+        return records
 
     @classmethod
     def processData(cls):
-        tree = cls.raw
-        def recurse(label_node, parent=None):
-            name = label_node.get('name')
-            abbrev = label_node.get('abbreviation')
-            id = label_node.get('id')
-            yield id, name, abbrev, parent
-            for child in label_node.getchildren():
-                if child.tag == 'label':
-                    yield from recurse(child, parent=id)
-
-        records = tuple()
-        for structure in tree.xpath('//structure'):
-            for lab in structure.getchildren():
-                if lab.tag == 'label':
-                    records += tuple(recurse(lab, None))
-
-        return records,
+        return tuple(cls.raw),
 
     @classmethod
     def validate(cls, d):
@@ -0,0 +1,38 @@
+import unittest
+from nifstd_tools.parcellation import PaxRatLabels
+
+
+class PaxTestLabels(PaxRatLabels):
+    filename = 'test-pax-labels'
+    sources = tuple()
+    _dupes = {}
+    _merge = {}
+
+
+class TestPaxLabels(unittest.TestCase):
+    def test_lookup_iri(self):
+        labels = PaxTestLabels()
+        # combined_record, struct_prov, collisions, abbrev_prov
+        labels._records = ({'A': ([], ('alpha', 'first'), None, []),
+                            'B': (['A'], ('beta',), None, []),
+                            'C': (['A2'], ('alpha',), None, [])},
+                           {'first': []}, {}, {})
+
+        iri = labels.lookup_iri('A', 'first')
+        assert labels.lookup_iri('A', 'alpha') == iri
+        assert labels.lookup_iri('A', 'beta') != iri
+        assert len(set(labels.graph.subjects(None, None))) > 3, 'lookup should populate the graph'
+
+        labels._records[0]['D'] = ['A'], ('alpha',), None, []
+        labels._iri_index = None
+        try:
+            labels.lookup_iri('A', 'alpha')
+            raise AssertionError('should have failed')
+        except KeyError as e:
+            assert 'already in output' in str(e)
+
+        try:
+            labels.lookup_iri('A', 'gamma')
+            raise AssertionError('should have failed')
+        except KeyError:
+            pass
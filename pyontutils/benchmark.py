@@ -0,0 +1,399 @@
+#!/usr/bin/env python3.6
+"""Benchmark serialization, parsing and tree building on synthetic inputs.
+Results are written as json and can be compared against a previous run.
+Timings depend on the machine so no baseline is shipped. Write one with
+benchmark --output=baseline.json before a change and compare against it
+with benchmark --baseline=baseline.json afterward.
+
+Usage:
+    benchmark --list
+    benchmark [options] [<benchmark>...]
+
+Options:
+    -h --help               print this
+    -l --list               list the available benchmarks
+    -o --output=PATH        write results as json to PATH
+    -b --baseline=PATH      compare results against the json output of a previous run
+    -x --threshold=FRAC     fractional slowdown or memory growth that is a regression [default: 0.1]
+    -r --reps=N             repetitions per benchmark, the fastest is kept [default: 3]
+    -t --triples=N          number of triples in the synthetic graph [default: 10000]
+    -d --depth=N            nesting depth of blank node restrictions [default: 3]
+    -n --list-length=N      length of rdf lists in the synthetic graph [default: 10]
+    -m --terms=N            number of terms in the synthetic obo file [default: 2000]
+    -e --tree-depth=N       depth of the synthetic binary hierarchy [default: 10]
+    -k --neurons=N          number of neurons to construct [default: 200]
+    -s --scale=N            copies of ttlser/test/nasty.ttl to serialize [default: 20]
+    -c --techniques=N       number of techniques for the methods benchmarks [default: 2000]
+
+"""
+
+import os
+import sys
+import json
+import platform
+import tempfile
+import tracemalloc
+from io import BytesIO
+from time import perf_counter
+from pathlib import Path
+from collections import OrderedDict
+import rdflib
+from pyontutils.core import cull_prefixes
+from pyontutils.utils import makeSimpleLogger
+from pyontutils.namespaces import PREFIXES as uPREFIXES
+from pyontutils.closed_namespaces import rdf, rdfs, owl
+
+log = makeSimpleLogger('benchmark')
+
+benchmarks = OrderedDict()
+_namespaces = 'ilxtr', 'UBERON', 'CHEBI', 'GO', 'BFO', 'NCBITaxon', 'PR', 'CL'
+
+
+def benchmark(*params):
+    """ register a setup function that takes params and returns the number
+        of operations, a function to time and optionally a cleanup function """
+    def inner(setup):
+        benchmarks[setup.__name__] = params, setup
+        return setup
+    return inner
+
+
+def synthetic_graph(triples, depth, list_length):
+    """ owl classes spread across the standard namespaces with labels,
+        nested blank node restrictions and rdf lists until there are at
+        least `triples` triples in the graph """
+    graph = rdflib.Graph()
+    namespaces = [rdflib.Namespace(uPREFIXES[p]) for p in _namespaces]
+    for p, ns in zip(_namespaces, namespaces):
+        graph.bind(p, ns)
+
+    def term(i):
+        return namespaces[i % len(namespaces)][f'{i:07}']
+
+    i = 0
+    while len(graph) < triples:
+        s = term(i)
+        graph.add((s, rdf.type, owl.Class))
+        graph.add((s, rdfs.label, rdflib.Literal(f'synthetic term {i}')))
+        if i:
+            graph.add((s, rdfs.subClassOf, term(i // 2)))
+
+        if not i % 10:
+            subject = s
+            for d in range(depth):
+                restriction = rdflib.BNode()
+                graph.add((subject, rdfs.subClassOf if subject == s else owl.someValuesFrom,
+                           restriction))
+                graph.add((restriction, rdf.type, owl.Restriction))
+                graph.add((restriction, owl.onProperty, term(d)))
+                subject = restriction
+
+            graph.add((subject, owl.someValuesFrom, term(i + 1)))
+
+        if not (i + 5) % 10 and list_length:
+            members = [term(i + j + 1) for j in range(list_length)]
+            head = rdflib.BNode()
+            rdflib.collection.Collection(graph, head, members)
+            union = rdflib.BNode()
+            graph.add((union, rdf.type, owl.Class))
+            graph.add((union, owl.unionOf, head))
+            graph.add((s, owl.equivalentClass, union))
+
+        i += 1
+
+    return graph
+
+
+def scaled_graph(path, scale):
+    """ `scale` copies of the graph in path, subjects are suffixed
+        with the copy number and blank nodes are fresh for each copy """
+    source = rdflib.Graph().parse(path.as_posix(), format='turtle')
+    subjects = set(s for s in source.subjects() if isinstance(s, rdflib.URIRef))
+    graph = rdflib.Graph()
+    for p, n in source.namespaces():
+        graph.bind(p, n)
+
+    for i in range(scale):
+        bnodes = {}
+        def copy(e):
+            if isinstance(e, rdflib.BNode):
+                if e not in bnodes:
+                    bnodes[e] = rdflib.BNode()
+                return bnodes[e]
+            elif i and e in subjects:
+                return rdflib.URIRef(f'{e}-{i}')
+            return e
+
+        graph.addN((copy(s), p, copy(o), graph) for s, p, o in source)
+
+    return graph
+
+
+def synthetic_obo(terms):
+    """ obo text with a header, a typedef and `terms` terms """
+    header = ('format-version: 1.2\n'
+              'ontology: synthetic\n'
+              'idspace: SYN http://uri.example.org/synthetic/SYN_ "synthetic terms"\n')
+    typedef = '[Typedef]\nid: part_of\nname: part of\nis_transitive: true\n'
+    stanzas = [f'[Term]\n'
+               f'id: SYN:{i:07}\n'
+               f'name: synthetic term {i}\n'
+               f'def: "Definition of synthetic term {i}." [SYN:{i:07}]\n'
+               f'synonym: "synonym {i}" EXACT []\n'
+               f'xref: OTHER:{i}\n' +
+               (f'is_a: SYN:{i // 2:07} ! synthetic term {i // 2}\n'
+                f'relationship: part_of SYN:{i // 3:07} ! synthetic term {i // 3}\n'
+                if i else '')
+               for i in range(terms)]
+    return '\n'.join((header, *stanzas, typedef))
+
+
+def synthetic_tree(depth):
+    """ scigraph style json for a complete binary subClassOf tree """
+    n = 2 ** depth - 1
+    nodes = [{'id': f'ilxtr:{i:07}', 'lbl': f'synthetic term {i}', 'meta': {}}
+             for i in range(n)]
+    edges = [{'sub': f'ilxtr:{i:07}', 'pred': 'subClassOf', 'obj': f'ilxtr:{(i - 1) // 2:07}'}
+             for i in range(1, n)]
+    return {'nodes': nodes, 'edges': edges}
+
+
+@benchmark('triples', 'depth', 'list_length')
+def ttlser(triples, depth, list_length):
+    graph = synthetic_graph(triples, depth, list_length)
+    return len(graph), lambda: graph.serialize(format='nifttl')
+
+
+@benchmark('scale')
+def nasty(scale):
+    """ ops are bytes of output so ops_per_sec is bytes/sec """
+    import ttlser
+    path = Path(ttlser.__file__).resolve().parent.parent / 'test' / 'nasty.ttl'
+    graph = scaled_graph(path, scale)
+    def run():
+        stream = BytesIO()
+        ttlser.CustomTurtleSerializer(graph).serialize(stream)
+        return stream
+
+    return len(run().getvalue()), run
+
+
+@benchmark('terms')
+def obo(terms):
+    from pyontutils.obo_io import OboFile
+    fd, path = tempfile.mkstemp(suffix='.obo')
+    with os.fdopen(fd, 'wt') as f:
+        f.write(synthetic_obo(terms))
+
+    return terms, lambda: OboFile(path), lambda: os.unlink(path)
+
+
+@benchmark('triples', 'depth', 'list_length')
+def cull(triples, depth, list_length):
+    graph = synthetic_graph(triples, depth, list_length)
+    return len(graph), lambda: cull_prefixes(graph)
+
+
+@benchmark('triples', 'depth', 'list_length')
+def qnames(triples, depth, list_length):
+    """ ops are uris so ops_per_sec is qnames/sec, each run starts with an empty memo """
+    from pyontutils.utils import QnameResolver
+    graph = synthetic_graph(triples, depth, list_length)
+    uris = [e for t in graph for e in t if isinstance(e, rdflib.URIRef)]
+    return len(uris), lambda: QnameResolver.from_graph(graph).qname_all(uris)
+
+
+@benchmark('tree_depth')
+def tree(tree_depth):
+    from pyontutils.hierarchies import creatTree
+    j = synthetic_tree(tree_depth)
+    return len(j['nodes']), lambda: creatTree('ilxtr:0000000', 'subClassOf', 'INCOMING',
+                                              tree_depth, json=j)
+
+
+@benchmark('neurons')
+def neurons(neurons):
+    from neurondm import Config, Neuron, Phenotype, NegPhenotype
+
+    def run():
+        config = Config('benchmark-neurons')
+        for i in range(neurons):
+            Neuron(Phenotype(f'ilxtr:{i // 7:07}', 'ilxtr:hasSomaLocatedIn'),
+                   Phenotype(f'ilxtr:{i % 7:07}', 'ilxtr:hasExpressionPhenotype'),
+                   NegPhenotype(f'ilxtr:{i % 11:07}', 'ilxtr:hasMorphologicalPhenotype'),
+                   Phenotype(f'ilxtr:{i:07}', 'ilxtr:hasProjectionPhenotype'))
+
+        config.neurons()
+
+    return neurons, run
+
+
+def methods_calls(techniques):
+    """ arguments for `techniques` calls to methods _t covering the
+        shapes used by the methods ontology """
+    from nifstd_tools.methods.core import restN, oECN
+    from pyontutils.combinators import Restriction2, intersectionOf
+    from pyontutils.namespaces import ilxtr, hasPart, hasInput
+    restMax = Restriction2(rdfs.subClassOf, owl.onProperty, owl.someValuesFrom, owl.maxCardinality)
+    one = rdflib.Literal(1, datatype=rdflib.XSD.nonNegativeInteger)
+
+    def term(i):
+        return ilxtr[f'synthetic{i:07}']
+
+    shapes = (lambda i: ((hasPart, term(i + 1)),),
+              lambda i: (intersectionOf(term(i + 1), restN(hasInput, term(i + 2))),
+                         (hasPart, term(i + 3))),
+              lambda i: ((hasInput, intersectionOf(term(i + 1), restN(hasPart, term(i + 2)))),),
+              lambda i: (restMax(hasInput, term(i + 1), one),),
+              lambda i: (restN(hasPart, term(i + 1)),),)
+    kwargs = (lambda i: dict(synonyms=(f'synonym {i}',)),
+              lambda i: dict(def_=f'Definition of synthetic technique {i}.',
+                             synonyms=(f'synonym {i}', f'other synonym {i}')),
+              lambda i: dict(comment=f'comment {i}'),
+              lambda i: dict(),
+              lambda i: dict(equivalentClass=oECN),)
+    return [((term(i), f'synthetic technique {i}', *shapes[i % len(shapes)](i)),
+             kwargs[i % len(kwargs)](i))
+            for i in range(techniques)]
+
+
+@benchmark('techniques')
+def methods(techniques):
+    """ ops are triples so ops_per_sec is triples/sec for _t through its templates """
+    from nifstd_tools.methods.core import _t
+    calls = methods_calls(techniques)
+    run = lambda: [t for args, kwargs in calls for t in _t(*args, **kwargs)]
+    return len(run()), run
+
+
+@benchmark('techniques')
+def methods_generators(techniques):
+    """ the calls from methods run through the _t generators directly """
+    from nifstd_tools.methods.core import _t
+    calls = methods_calls(techniques)
+    run = lambda: [t for args, kwargs in calls for t in _t.function(*args, **kwargs)]
+    return len(run()), run
+
+
+def measure(function, reps):
+    """ best wall time of reps runs and the peak traced memory of one more """
+    times = []
+    for _ in range(reps):
+        start = perf_counter()
+        function()
+        times.append(perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return min(times), sum(times) / len(times), peak
+
+
+def run(names=tuple(), reps=3, **params):
+    """ run benchmarks by name, all of them by default """
+    results = OrderedDict()
+    for name in (names if names else benchmarks):
+        needs, setup = benchmarks[name]
+        bparams = {p: params[p] for p in needs}
+        try:
+            ops, function, *cleanup = setup(**bparams)
+        except Exception as e:
+            log.warning(f'skipping {name} setup failed with {e!r}')
+            results[name] = {'params': bparams, 'skipped': repr(e)}
+            continue
+
+        try:
+            best, mean, peak = measure(function, reps)
+        finally:
+            for c in cleanup:
+                c()
+
+        results[name] = {'params': bparams,
+                         'reps': reps,
+                         'ops': ops,
+                         'seconds': best,
+                         'mean_seconds': mean,
+                         'ops_per_sec': ops / best if best else None,
+                         'peak_memory': peak}
+        log.info(f'{name} {best:.4f}s {ops / best:.1f} ops/s {peak / 2 ** 20:.2f} MiB')
+
+    return {'meta': {'python': platform.python_version(),
+                     'rdflib': rdflib.__version__,
+                     'platform': platform.platform()},
+            'results': results}
+
+
+def compare(current, baseline, threshold=.1):
+    """ report per benchmark ratios of current to baseline
+        returns the report lines and the names of any regressions """
+    lines, regressions = [], []
+    for name, result in current['results'].items():
+        if name not in baseline['results']:
+            continue
+
+        base = baseline['results'][name]
+        if 'skipped' in result or 'skipped' in base:
+            lines.append(f'{name:<10} skipped')
+            continue
+        elif result['params'] != base['params']:
+            lines.append(f'{name:<10} params differ {result["params"]} != {base["params"]}')
+            continue
+
+        time_ratio = result['seconds'] / base['seconds']
+        memory_ratio = result['peak_memory'] / base['peak_memory'] if base['peak_memory'] else 1
+        regressed = time_ratio > 1 + threshold or memory_ratio > 1 + threshold
+        if regressed:
+            regressions.append(name)
+
+        lines.append(f'{name:<10} time {time_ratio:6.3f}x memory {memory_ratio:6.3f}x'
+                     + (' REGRESSION' if regressed else ''))
+
+    return lines, regressions
+
+
+def main():
+    from docopt import docopt
+    args = docopt(__doc__)
+    if args['--list']:
+        for name, (params, _) in benchmarks.items():
+            print(name, *params)
+        return
+
+    unknown = [n for n in args['<benchmark>'] if n not in benchmarks]
+    if unknown:
+        raise SystemExit(f'unknown benchmarks {unknown}, choose from {list(benchmarks)}')
+
+    current = run(args['<benchmark>'],
+                  reps=int(args['--reps']),
+                  triples=int(args['--triples']),
+                  depth=int(args['--depth']),
+                  list_length=int(args['--list-length']),
+                  terms=int(args['--terms']),
+                  tree_depth=int(args['--tree-depth']),
+                  neurons=int(args['--neurons']),
+                  scale=int(args['--scale']),
+                  techniques=int(args['--techniques']))
+
+    out = json.dumps(current, indent=2)
+    if args['--output']:
+        with open(args['--output'], 'wt') as f:
+            f.write(out)
+    else:
+        print(out)
+
+    if args['--baseline']:
+        with open(args['--baseline'], 'rt') as f:
+            baseline = json.load(f)
+
+        lines, regressions = compare(current, baseline, float(args['--threshold']))
+        print('\n'.join(lines))
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -64,6 +64,218 @@ def olit(subject, predicate, *objects):
             yield subject, predicate, rdflib.Literal(object)
 
 
+class Template:
+    """ A combinator expression flattened once into triples with slots.
+
+        function is called once with placeholder URIRefs in place of its
+        nargs arguments and the triples it produces are recorded with every
+        BNode replaced by a bnode slot. Instantiating the template only
+        allocates fresh BNodes and substitutes the arguments, none of the
+        generators are rerun. This means that the arguments must not change
+        the structure of the output, so no combinators, and no None or ''
+        values where the expression would skip a triple. Raises ValueError
+        if an argument does not appear unchanged in the output so that the
+        caller can fall back to running the function directly. """
+
+    _slot_base = 'urn:pyontutils:template-slot:'
+
+    def __init__(self, function, nargs):
+        self.nargs = nargs
+        slots = tuple(rdflib.URIRef(self._slot_base + str(i)) for i in range(nargs))
+        arg_slots = {s:i for i, s in enumerate(slots)}
+        lit_slots = {rdflib.Literal(s):i for i, s in enumerate(slots)}
+        constants = []
+        constant_index = {}
+        bnodes = {}
+        literal_args = []
+        positions = []
+        for triple in flattenTriples((function(*slots),)):
+            row = []
+            for e in triple:
+                if isinstance(e, rdflib.BNode):
+                    row.append(('b', bnodes.setdefault(e, len(bnodes))))
+                elif isinstance(e, rdflib.URIRef) and e in arg_slots:
+                    row.append(('a', arg_slots[e]))
+                elif isinstance(e, rdflib.Literal) and e in lit_slots:
+                    i = lit_slots[e]
+                    if i not in literal_args:
+                        literal_args.append(i)
+
+                    row.append(('l', literal_args.index(i)))
+                else:
+                    if e not in constant_index:
+                        constant_index[e] = len(constants)
+                        constants.append(e)
+
+                    row.append(('c', constant_index[e]))
+
+            positions.append(row)
+
+        for e in constants:
+            # an argument that was transformed rather than passed through,
+            # e.g. formatted into a string or typed, would be baked in
+            if (self._slot_base in e or
+                isinstance(e, rdflib.Literal) and
+                (self._slot_base in str(e.value) or
+                 e.datatype is not None and self._slot_base in e.datatype)):
+                raise ValueError(f'{function} does not pass its arguments '
+                                 f'through unchanged, found {e!r}')
+
+        # the row for an instance is constants + bnodes + args + literal args
+        offsets = {'c': 0,
+                   'b': len(constants),
+                   'a': len(constants) + len(bnodes),
+                   'l': len(constants) + len(bnodes) + nargs,}
+        self._constants = constants
+        self._nbnodes = len(bnodes)
+        self._literal_args = tuple(literal_args)
+        self._index = tuple(tuple(offsets[kind] + i for kind, i in row)
+                            for row in positions)
+
+    def __len__(self):
+        """ number of triples produced per instance """
+        return len(self._index)
+
+    def _row(self, args):
+        if len(args) != self.nargs:
+            raise TypeError(f'template takes {self.nargs} arguments '
+                            f'but {len(args)} were given')
+
+        return (self._constants +
+                [rdflib.BNode() for _ in range(self._nbnodes)] +
+                list(args) +
+                [a if isinstance(a, rdflib.Literal) else rdflib.Literal(a)
+                 for a in (args[i] for i in self._literal_args)])
+
+    def __call__(self, *args):
+        row = self._row(args)
+        for i, j, k in self._index:
+            yield row[i], row[j], row[k]
+
+    def quads(self, graph, rows):
+        """ quads for every set of arguments in rows suitable for graph.addN """
+        for args in rows:
+            row = self._row(args)
+            for i, j, k in self._index:
+                yield row[i], row[j], row[k], graph
+
+    def addN(self, graph, rows):
+        """ instantiate the template for every set of arguments in rows directly
+            into graph, returns the number of triples added """
+        quads = list(self.quads(graph, rows))
+        graph.addN(quads)
+        return len(quads)
+
+
+def _shape(thing, leaves):
+    """ hashable structure of thing with its leaf values appended to leaves
+        in order, None if thing cannot be rebuilt from its structure """
+    if isinstance(thing, (str, int, float)) and not isinstance(thing, bool):
+        if thing:
+            leaves.append(thing)
+            return 'v',
+
+        return 'k', type(thing), thing  # falsy values change what is serialized
+
+    elif thing is None or isinstance(thing, (bool, Triple, type, types.FunctionType)):
+        return 'k', type(thing), thing
+
+    elif isinstance(thing, (tuple, list)):
+        shapes = tuple(_shape(t, leaves) for t in thing)
+        if None not in shapes:
+            return 's', type(thing), shapes
+
+    elif isinstance(thing, Combinator):
+        outer, predicate = getattr(thing, 'outer_self', None), None
+        if isinstance(outer, Restriction2) and hasattr(thing, 'objects'):
+            parts = thing.objects
+        elif isinstance(outer, (PredicateList, EquivalentClass)):
+            parts = thing.combinators
+        elif (isinstance(outer, Restriction) and
+              isinstance(thing, RestrictionCombinator) and
+              not isinstance(thing, RestrictionsCombinator)):
+            parts = thing.predicate, thing.object
+        elif type(thing) in (_POCombinator, POCombinator):
+            outer, predicate, parts = type(thing), thing.predicate, (thing.object,)
+        else:
+            return  # unknown combinators may close over anything
+
+        shapes = tuple(_shape(p, leaves) for p in parts)
+        if None not in shapes:
+            return 'c', outer, predicate, shapes
+
+
+def _rebuild(shape, slots):
+    """ inverse of _shape taking the leaf values from the iterator slots """
+    kind, *rest = shape
+    if kind == 'v':
+        return next(slots)
+    elif kind == 'k':
+        return rest[1]
+    elif kind == 's':
+        cls, shapes = rest
+        return cls(_rebuild(s, slots) for s in shapes)
+
+    outer, predicate, shapes = rest
+    parts = [_rebuild(s, slots) for s in shapes]
+    if predicate is not None:
+        return outer(predicate, *parts)
+    elif isinstance(outer, Restriction):
+        return Restriction.__call__(outer, *parts)  # Restrictions returns a generator
+    else:
+        return outer(*parts)
+
+
+class Templates:
+    """ Templates for function keyed on the structure of its arguments.
+
+        Combinator arguments made by Restriction2, Restriction, the
+        PredicateLists, EquivalentClass and POCombinator are taken apart
+        and rebuilt around slots, so the nested bnode structure that they
+        produce is compiled into the template and only their leaf values
+        vary between calls. Calls containing any other combinator, and
+        calls that Template rejects, run function directly. """
+
+    def __init__(self, function):
+        self.function = function
+        self.__name__ = function.__name__
+        self.__doc__ = function.__doc__
+        self._templates = {}
+
+    def _key(self, args, kwargs, leaves):
+        shapes = (_shape(args, leaves),
+                  *(_shape(v, leaves) for _, v in sorted(kwargs.items())))
+        if None not in shapes:
+            return shapes[0], tuple(zip(sorted(kwargs), shapes[1:]))
+
+    def _compile(self, key, nargs):
+        args_shape, kwargs_shapes = key
+        def function(*slots):
+            slots = iter(slots)
+            args = _rebuild(args_shape, slots)
+            kwargs = {k:_rebuild(s, slots) for k, s in kwargs_shapes}
+            return self.function(*args, **kwargs)
+
+        try:
+            return Template(function, nargs)
+        except (ValueError, TypeError):
+            return None  # the direct call will raise if the error was real
+
+    def __call__(self, *args, **kwargs):
+        leaves = []
+        key = self._key(args, kwargs, leaves)
+        if key is not None:
+            if key not in self._templates:
+                self._templates[key] = self._compile(key, len(leaves))
+
+            template = self._templates[key]
+            if template is not None:
+                yield from template(*leaves)
+                return
+
+        yield from self.function(*args, **kwargs)
+
+
 class Combinator:  # FIXME naming, these aren't really thunks, they are combinators
     def __init__(self, *present):
         raise NotImplemented
@@ -1,25 +1,26 @@
 import os
 import yaml
 import types
+import threading
 import subprocess
 import rdflib
 from inspect import getsourcefile
 from pathlib import Path
 from itertools import chain
-from collections import namedtuple
+from collections import namedtuple, defaultdict, Counter
 import ontquery as oq
 import requests
 import htmlfn as hfn
-from joblib import Parallel, delayed
 from rdflib.extras import infixowl
+from rdflib.plugins.memory import IOMemory
 from ttlser import CustomTurtleSerializer
 from pyontutils import closed_namespaces as cnses
-from pyontutils.utils import refile, TODAY, UTCNOW, getSourceLine
+from pyontutils.utils import refile, TODAY, UTCNOW, getSourceLine, PrefixTrie, QnameResolver
 from pyontutils.utils import Async, deferred, TermColors as tc, log
 from pyontutils.utils_extra import check_value
 from pyontutils.config import get_api_key, devconfig, working_dir
 from pyontutils.namespaces import makePrefixes, makeNamespaces, makeURIs
-from pyontutils.namespaces import NIFRID, ilxtr, PREFIXES as uPREFIXES
+from pyontutils.namespaces import NIFRID, ilxtr, qnames, PREFIXES as uPREFIXES
 from pyontutils import combinators as cmb
 from pyontutils.closed_namespaces import rdf, rdfs, owl, skos, dc, dcterms, prov
 from IPython import embed
@@ -55,34 +56,122 @@ def standard_checks(graph):
     cardinality(rdfs.label)
 
 
-def build(*onts, fail=False, n_jobs=9, write=True):
-    """ Set n_jobs=1 for debug or embed() will crash. """
-    tail = lambda:tuple()
-    lonts = len(onts)
-    if lonts > 1:
-        for i, ont in enumerate(onts):
-            if ont.__name__ == 'parcBridge':
-                onts = onts[:-1]
-                def tail(o=ont):
-                    return o.setup(),
-                if i != lonts - 1:
-                    raise ValueError('parcBridge should be built last to avoid weird errors!')
+def build_order(onts):
+    """ Return a topological ordering of onts and a mapping from each ont
+        to the onts in the same build that it depends on via imports or
+        sources. Dependencies are always set up and made first. """
+    def deps(ont):
+        imports = ont.imports
+        if isinstance(imports, property):
+            imports = tuple()
+        elif not isinstance(imports, tuple):  # e.g. a generator in the class body
+            imports = tuple(imports)
+            ont.imports = imports  # otherwise prepare will find it exhausted
+
+        sources = getattr(ont, 'sources', tuple())
+        return tuple(d for d in imports + tuple(sources) if d in members and d is not ont)
+
+    members = set(onts)
+    graph = {ont:deps(ont) for ont in onts}
+    order = []
+    state = {}  # 1 visiting 2 done
+    def visit(ont, path=tuple()):
+        if state.get(ont) == 2:
+            return
+        elif state.get(ont) == 1:
+            cycle = ' -> '.join(o.__name__ for o in path + (ont,))
+            raise ValueError(f'import cycle in build {cycle}')
+
+        state[ont] = 1
+        for dep in graph[ont]:
+            visit(dep, path + (ont,))
+
+        state[ont] = 2
+        order.append(ont)
+
+    for ont in onts:
+        visit(ont)
+
+    return order, graph
+
+
+_build_state = None  # inherited by forked build workers
+
+
+def _build_make(index, fail, write):
+    ont = _build_state[index]
+    before = dict(vars(ont))
+    ont.make(fail=fail, write=write)
+    # instance attributes set by make, e.g. lookup tables, go back to the parent
+    # the graphs are sent separately as triples and class state is not returned
+    state = {k:v for k, v in vars(ont).items()
+             if k not in ('_graph', 'graph') and (k not in before or before[k] is not v)}
+    return tuple(ont.graph), state
+
+
+def build(*onts, fail=False, n_jobs=1, write=True):
+    """ Set n_jobs > 1 to make in parallel, do not for debug or embed() will crash.
+
+        Setup runs serially in dependency order since prepare modifies the
+        classes. With n_jobs > 1 make and write run in forked worker processes
+        as soon as the onts they import have finished. The triples and any
+        instance attributes that make sets are copied back to the parent, so
+        make must not modify class or module state that is needed later and
+        the attributes it sets must be picklable. Returns the onts in the
+        order they were passed in. """
+    global _build_state
+    # resolve provenance for all local sources in one git call per repo
+    git_provenance.prefetch(*(source.source for ont in onts
+                              for source in getattr(ont, 'sources', tuple())
+                              if isinstance(source, type) and
+                              isinstance(source.source, str) and
+                              not source.source.startswith('http') and
+                              os.path.exists(source.source)))
+    order, depends = build_order(onts)
     # ont_setup must be run first on all ontologies
     # or we will get weird import errors
-    if n_jobs == 1 or True:
-        return tuple(ont.make(fail=fail, write=write) for ont in
-                     tuple(ont.setup() for ont in onts) + tail())
-
-    # have to use a listcomp so that all calls to setup()
-    # finish before parallel goes to work
-    return Parallel(n_jobs=n_jobs)(delayed(o.make)(fail=fail, write=write)
-                                   for o in
-                                   #[ont_setup(ont) for ont in onts])
-                                   (tuple(Async()(deferred(ont.setup)()
-                                                  for ont in onts)) + tail()
-                                    if n_jobs > 1
-                                    else [ont.setup()
-                                          for ont in onts]))
+    built = {ont:ont.setup() for ont in order}
+    if n_jobs == 1 or len(onts) == 1:
+        for ont in order:
+            built[ont].make(fail=fail, write=write)
+
+        return tuple(built[ont] for ont in onts)
+
+    from queue import Queue
+    from multiprocessing import get_context
+    _build_state = [built[ont] for ont in order]
+    index = {ont:i for i, ont in enumerate(order)}
+    waiting = {ont:set(deps) for ont, deps in depends.items()}
+    done = Queue()
+    try:
+        # workers find the onts in _build_state so they must be forked
+        with get_context('fork').Pool(processes=min(n_jobs, len(order))) as pool:
+            def submit():
+                for ont, deps in list(waiting.items()):
+                    if not deps:
+                        waiting.pop(ont)
+                        pool.apply_async(_build_make, (index[ont], fail, write),
+                                         callback=lambda r, o=ont: done.put((o, r, None)),
+                                         error_callback=lambda e, o=ont: done.put((o, None, e)))
+
+            submit()
+            for _ in order:
+                ont, result, error = done.get()
+                if error is not None:
+                    raise error  # multiprocessing attaches the remote traceback as __cause__
+
+                made = built[ont]
+                triples, state = result
+                [made.graph.add(t) for t in triples]
+                vars(made).update(state)
+                for deps in waiting.values():
+                    deps.discard(ont)
+
+                submit()
+    finally:
+        _build_state = None
+
+    return tuple(built[ont] for ont in onts)
 
 
 def yield_recursive(s, p, o, source_graph):  # FIXME transitive_closure on rdflib.Graph?
@@ -565,6 +654,7 @@ class makeGraph:
         self.name = name
         self.writeloc = writeloc
         self.namespaces = {}
+        self._qnames = None
         if prefixes:
             self.namespaces.update({p:getNamespace(p, ns) for p, ns in prefixes.items()})
         if graph:  # graph takes precidence
@@ -590,11 +680,13 @@ class makeGraph:
     def add_namespace(self, prefix, namespace):
         self.namespaces[prefix] = getNamespace(prefix, namespace)
         self.g.bind(prefix, namespace)
+        self._qnames = None
 
     def del_namespace(self, prefix):
         try:
             self.namespaces.pop(prefix)
             self.g.store._IOMemory__namespace.pop(prefix)
+            self._qnames = None
         except KeyError:
             print('Namespace (%s) does not exist!' % prefix)
             pass
@@ -766,19 +858,37 @@ class makeGraph:
     def replace_uriref(self, find, replace):  # find and replace on the parsed graph
         # XXX warning this does not update cases where an iri is in an annotation property!
         #  if you need that just use sed
-        # XXX WARNING if you are doing multiple replaces you need to replace the ENTIRE
-        #  set first, and THEN transfer those, otherwise you will insert half replaced
+        # XXX WARNING if you are doing multiple replaces use replace_urirefs so that the
+        #  ENTIRE set is staged at once, otherwise you will insert half replaced
         #  triples into a graph!
-
-        find = self.check_thing(find)
-
-        for i in range(3):
-            trip = [find if i == _ else None for _ in range(3)]
-            for s, p, o in self.g.triples(trip):
-                rep = [s, p, o]
-                rep[i] = replace
-                self.add_trip(*rep)
-                self.g.remove((s, p, o))
+        return self.replace_urirefs({find:replace})
+
+    def replace_urirefs(self, mapping):
+        """ Replace every key of mapping with its value in a single pass.
+            All replacements are computed from the original triples before
+            any are applied so a -> b, b -> c never turns a into c.
+            Returns a Counter of occurrences replaced per original uri. """
+        mapping = {self.check_thing(f):self.check_thing(r) for f, r in mapping.items()}
+        if len(mapping) * 8 < len(self.g):  # few uris, use the store indexes
+            triples = set(t for f in mapping
+                          for pattern in ((f, None, None), (None, f, None), (None, None, f))
+                          for t in self.g.triples(pattern))
+        else:  # many uris, one scan is cheaper than three lookups each
+            triples = [t for t in self.g
+                       if t[0] in mapping or t[1] in mapping or t[2] in mapping]
+
+        counts = Counter()
+        remove, add = [], []
+        for t in triples:
+            remove.append(t)
+            add.append(tuple(mapping[e] if e in mapping else e for e in t) + (self.g,))
+            counts.update(e for e in t if e in mapping)
+
+        for t in remove:
+            self.g.remove(t)
+
+        self.g.addN(add)
+        return counts
 
     def replace_subject_object(self, p, s, o, rs, ro):  # useful for porting edges to equivalent classes
         self.add_trip(rs, p, ro)
@@ -795,14 +905,24 @@ class makeGraph:
 
     def qname(self, uri, generate=False):
         """ Given a uri return the qname if it exists, otherwise return the uri. """
-        try:
+        if self._qnames is None:
+            self._qnames = QnameResolver.from_graph(self.g)
+
+        qname = self._qnames.qname(uri)
+        if qname is not None:
+            return qname
+
+        try:  # generate or prefixes bound directly to self.g
             prefix, namespace, name = self.g.namespace_manager.compute_qname(uri, generate=generate)
             qname = ':'.join((prefix, name))
+            self._qnames = None
             return qname
         except (KeyError, ValueError) as e:
             return uri.toPython() if isinstance(uri, rdflib.URIRef) else uri
 
     def make_scigraph_json(self, edge, label_edge=None, direct=False):  # for checking trees
+        """ all edges of one predicate as scigraph json, for rooted
+            queries see pyontutils.scigraph_local.LocalGraph """
         if label_edge is None:
             label_edge = rdfs.label
         else:
@@ -814,113 +934,109 @@ class makeGraph:
             restriction = self.expand('rdfs:isDefinedBy')
         else:
             restriction = self.expand(edge)
+
+        labels = {}
+        def label(node):  # one lookup per node rather than per edge
+            if node not in labels:
+                for o in self.g.objects(node, label_edge):
+                    labels[node] = o.toPython()
+                    break
+                else:  # no label
+                    labels[node] = node.toPython()
+            return labels[node]
+
+        done = set()
+        def add_node(id_, lbl, dep=False):
+            if id_ not in done:
+                node = {'lbl':lbl,'id':id_, 'meta':{}}
+                if dep: node['meta'][owl.deprecated.toPython()] = True
+                json_['nodes'].append(node)
+                done.add(id_)
+
         if direct:
-            #trips = list(self.g.triples((None, restriction, None)))
             pred = restriction
-            done = []
-            #print('make_scigraph_json predicate:', repr(pred))
             #for obj, sub in self.g.subject_objects(pred):  # yes these are supposed to be flipped?
             for sub, obj in self.g.subject_objects(pred):  # or maybe they aren't?? which would explain some of my confusion
-                try:
-                    olab = list(self.g.objects(obj, label_edge))[0].toPython()
-                except IndexError:  # no label
-                    olab = obj.toPython()
-                try:
-                    slab = list(self.g.objects(sub, label_edge))[0].toPython()
-                except IndexError:  # no label
-                    slab = sub.toPython()
-
+                olab, slab = label(obj), label(sub)
                 obj = self.qname(obj)
                 sub = self.qname(sub)
                 json_['edges'].append({'sub':sub,'pred':edge,'obj':obj})
-                if sub not in done:
-                    node = {'lbl':slab,'id':sub, 'meta':{}}
-                    #if sdep: node['meta'][owl.deprecated.toPython()] = True
-                    json_['nodes'].append(node)
-                    done.append(sub)
-                if obj not in done:
-                    node = {'lbl':olab,'id':obj, 'meta':{}}
-                    #if odep: node['meta'][owl.deprecated.toPython()] = True
-                    json_['nodes'].append(node)
-                    done.append(obj)
+                add_node(sub, slab)
+                add_node(obj, olab)
             return json_
 
-        #linkers = list(self.g.subjects(owl.onProperty, restriction))
-        done = []
+        deprecated = set(self.g.subjects(owl.deprecated, None))
+        values = defaultdict(list)
+        for p in (owl.someValuesFrom, owl.allValuesFrom):  # someValuesFrom first
+            for s, o in self.g.subject_objects(p):
+                values[s].append(o)
+
+        parents = defaultdict(list)
+        for s, o in self.g.subject_objects(rdfs.subClassOf):
+            parents[o].append(s)
+
         for linker in self.g.subjects(owl.onProperty, restriction):
-            try:
-                obj = list(self.g.objects(linker, owl.someValuesFrom))[0]
-            except IndexError:
-                obj = list(self.g.objects(linker, owl.allValuesFrom))[0]
+            obj = values[linker][0]
             if type(obj) != rdflib.term.URIRef:
                 continue  # probably encountere a unionOf or something and don't want
-            try:
-                olab = list(self.g.objects(obj, label_edge))[0].toPython()
-            except IndexError:  # no label
-                olab = obj.toPython()
-            odep = True if list(self.g.objects(obj, owl.deprecated)) else False
+            olab = label(obj)
+            odep = obj in deprecated
             obj = self.qname(obj)
-            sub = list(self.g.subjects(rdfs.subClassOf, linker))[0]
-            try:
-                slab = list(self.g.objects(sub, label_edge))[0].toPython()
-            except IndexError:  # no label
-                slab = sub.toPython()
-            sdep = True if list(self.g.objects(sub, owl.deprecated)) else False
+            sub = parents[linker][0]
+            slab = label(sub)
+            sdep = sub in deprecated
             try:
                 sub = self.qname(sub)
             except:  # rdflib has iffy error handling here so need to catch unsplitables
                 print('Could not split the following uri:', sub)
 
             json_['edges'].append({'sub':sub,'pred':edge,'obj':obj})
-            if sub not in done:
-                node = {'lbl':slab,'id':sub, 'meta':{}}
-                if sdep: node['meta'][owl.deprecated.toPython()] = True
-                json_['nodes'].append(node)
-                done.append(sub)
-            if obj not in done:
-                node = {'lbl':olab,'id':obj, 'meta':{}}
-                if odep: node['meta'][owl.deprecated.toPython()] = True
-                json_['nodes'].append(node)
-                done.append(obj)
+            add_node(sub, slab, sdep)
+            add_node(obj, olab, odep)
 
         return json_
 
 
-__helper_graph = makeGraph('', prefixes=uPREFIXES)
 def qname(uri, warning=False):
     """ compute qname from defaults """
     if warning:
         print(tc.red('WARNING:'), tc.yellow(f'qname({uri}) is deprecated! please use OntId({uri}).curie'))
-    return __helper_graph.qname(uri)
+    return qnames.qname(uri, uri.toPython() if isinstance(uri, rdflib.URIRef) else uri)
 
 
 null_prefix = uPREFIXES['']
-def cull_prefixes(graph, prefixes={k:v for k, v in uPREFIXES.items() if k != 'NIFTTL'},
-                  cleanup=lambda ps, graph: None, keep=False):
-    """ Remove unused curie prefixes and normalize to a standard set. """
+def _used_prefixes(graph, prefixes, keep=False, trie=None):
     prefs = ['']
     if keep:
-        prefixes.update({p:str(n) for p, n in graph.namespaces()})
+        prefixes = {**prefixes, **{p:str(n) for p, n in graph.namespaces()}}
+        trie = None
 
     if '' not in prefixes:
-        prefixes[''] = null_prefix  # null prefix
+        prefixes = {**prefixes, '':null_prefix}  # null prefix
+        trie = None
+
+    if trie is None:
+        trie = PrefixTrie(prefixes)
 
-    pi = {v:k for k, v in prefixes.items()}
-    asdf = {} #{v:k for k, v in ps.items()}
-    asdf.update(pi)
     # determine which prefixes we need
     for uri in set((e for t in graph for e in t)):
+        if type(uri) == rdflib.BNode:
+            continue
         if uri.endswith('.owl') or uri.endswith('.ttl') or uri.endswith('$$ID$$'):
             continue  # don't prefix imports or templates
-        for rn, rp in sorted(asdf.items(), key=lambda a: -len(a[0])):  # make sure we get longest first
-            lrn = len(rn)
-            if type(uri) == rdflib.BNode:
-                continue
-            elif uri.startswith(rn) and '#' not in uri[lrn:] and '/' not in uri[lrn:]:  # prevent prefixing when there is another sep
-                prefs.append(rp)
-                break
+        rp = trie.curie_prefix(uri)  # longest first, prevent prefixing when there is another sep
+        if rp is not None:
+            prefs.append(rp)
+
+    return {p:prefixes[p] for p in prefs}
 
-    ps = {p:prefixes[p] for p in prefs}
+
+def cull_prefixes(graph, prefixes={k:v for k, v in uPREFIXES.items() if k != 'NIFTTL'},
+                  cleanup=lambda ps, graph: None, keep=False, trie=None):
+    """ Remove unused curie prefixes and normalize to a standard set.
+        trie is an optional precomputed PrefixTrie for prefixes
+        (with the null prefix) to reuse across many graphs. """
+    ps = _used_prefixes(graph, prefixes, keep=keep, trie=trie)
 
     cleanup(ps, graph)
 
@@ -929,6 +1045,26 @@ def cull_prefixes(graph, prefixes={k:v for k, v in uPREFIXES.items() if k != 'NI
     return ng
 
 
+def cull_prefixes_inplace(graph, prefixes={k:v for k, v in uPREFIXES.items() if k != 'NIFTTL'},
+                          cleanup=lambda ps, graph: None, keep=False, trie=None):
+    """ cull_prefixes without copying the triples, the namespace bindings
+        of graph are replaced and a makeGraph wrapping graph is returned
+
+        Stores other than IOMemory have no way to remove a binding so
+        for those the triples are copied as they are by cull_prefixes. """
+    if not isinstance(graph.store, IOMemory):
+        return cull_prefixes(graph, prefixes, cleanup=cleanup, keep=keep, trie=trie)
+
+    ps = _used_prefixes(graph, prefixes, keep=keep, trie=trie)
+
+    cleanup(ps, graph)
+
+    graph.store._IOMemory__namespace.clear()
+    graph.store._IOMemory__prefix.clear()
+    graph.namespace_manager = rdflib.namespace.NamespaceManager(graph)  # rebinds the defaults
+    return makeGraph('', prefixes=ps, graph=graph)
+
+
 def createOntology(filename=    'temp-graph',
                    name=        'Temp Ontology',
                    prefixes=    None,  # is a dict
@@ -1180,6 +1316,104 @@ class Class:
         return repr(self.__dict__)
 
 
+class GitProvenance:
+    """ Per process cache of git HEAD commits and last commits per path.
+
+        Paths are resolved to the repository that contains them and all the
+        paths for a repository are resolved by a single `git log` walk, so
+        prefetch everything that will be needed before the first lookup. """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._roots = {}  # directory -> repo root or None
+        self._heads = {}  # repo root -> commit
+        self._commits = {}  # absolute path -> commit ('' if the path has no commits)
+
+    @staticmethod
+    def _git(cwd, *args):
+        return subprocess.check_output(['git', *args], cwd=cwd,
+                                       stderr=subprocess.DEVNULL).decode().rstrip('\n')
+
+    def root(self, path):
+        """ top level of the repository containing path or None """
+        path = Path(path).expanduser().absolute()
+        directory = (path if path.is_dir() else path.parent).as_posix()
+        with self._lock:
+            if directory not in self._roots:
+                try:
+                    self._roots[directory] = Path(self._git(directory, 'rev-parse',
+                                                            '--show-toplevel'))
+                except (subprocess.CalledProcessError, FileNotFoundError):
+                    self._roots[directory] = None
+
+            return self._roots[directory]
+
+    def head(self, path):
+        """ HEAD commit of the repository containing path or None """
+        root = self.root(path)
+        if root is None:
+            return
+
+        with self._lock:
+            if root not in self._heads:
+                try:
+                    self._heads[root] = self._git(root, 'rev-parse', 'HEAD')
+                except subprocess.CalledProcessError:
+                    self._heads[root] = None  # no commits yet
+
+            return self._heads[root]
+
+    def prefetch(self, *paths):
+        """ resolve the last commit for all paths, one git log per repository """
+        by_root = {}
+        for path in paths:
+            path = Path(path).expanduser().absolute()
+            root = self.root(path)
+            if root is not None and path.as_posix() not in self._commits:
+                by_root.setdefault(root, set()).add(path)
+
+        with self._lock:
+            for root, rpaths in by_root.items():
+                self._log(root, rpaths)
+
+    def _log(self, root, paths):
+        # --name-only lists paths relative to the root for each commit
+        # newest first, so the first commit that names a path is its last
+        missing = {p.resolve().relative_to(root.resolve()).as_posix():p for p in paths}
+        args = ['git', 'log', '--pretty=format:%x00%H', '--name-only', '--',
+                *sorted(missing)]
+        with subprocess.Popen(args, cwd=root, stdout=subprocess.PIPE,
+                              stderr=subprocess.DEVNULL) as proc:
+            commit = None
+            for line in proc.stdout:
+                line = line.decode().rstrip('\n')
+                if line.startswith('\x00'):
+                    commit = line[1:]
+                elif line in missing:
+                    self._commits[missing.pop(line).as_posix()] = commit
+                    if not missing:
+                        proc.kill()
+                        break
+
+        for path in missing.values():
+            self._commits[path.as_posix()] = ''  # untracked matches git log -n 1 output
+
+    def last_commit(self, path):
+        """ last commit that touched path, '' if it has none and None if
+            path is not in a git repository """
+        apath = Path(path).expanduser().absolute().as_posix()
+        if apath not in self._commits:
+            if self.root(apath) is None:
+                return
+
+            self.prefetch(apath)
+
+        return self._commits[apath]
+
+
+git_provenance = GitProvenance()
+
+
 class Source(tuple):
     """ Manages loading and converting source files into ontology representations """
     iri_prefix_working_dir = 'https://github.com/tgbugs/pyontutils/blob/{file_commit}/'
@@ -1216,7 +1450,7 @@ class Source(tuple):
                     if cls.sourceFile is not None:
                         file = cls.repo_path / cls.sourceFile
                         if not dry_run:  # dry_run means data may not be present
-                            file_commit = next(cls.repo.iter_commits(paths=file.as_posix(), max_count=1)).hexsha
+                            file_commit = git_provenance.last_commit(file)
                             commit_path = os.path.join('blob', file_commit, cls.sourceFile)
                             print(commit_path)
                             if 'github' in cls.source:
@@ -1237,22 +1471,16 @@ class Source(tuple):
                     cls.iri = rdflib.URIRef(cls.source)
 
             elif os.path.exists(cls.source):  # TODO no expanded stuff
-                try:
-                    file_commit = subprocess.check_output(['git', 'log', '-n', '1',
-                                                           '--pretty=format:%H', '--',
-                                                           cls.source],
-                                                          stderr=subprocess.DEVNULL).decode().rstrip()
+                file_commit = git_provenance.last_commit(cls.source)
+                if file_commit is not None:
                     cls.iri = rdflib.URIRef(cls.iri_prefix_wdf.format(file_commit=file_commit) + cls.source)
                     cls._type = 'git-local'
-                except subprocess.CalledProcessError as e:
+                else:  # not in a git repository
                     cls._type = 'local'
-                    if e.args[0] == 128:  # hopefully this is the git status code for not a get repo...
-                        if not hasattr(cls, 'iri'):
-                            cls.iri = rdflib.URIRef('file://' + cls.source)
-                        #else:
-                            #print(cls, 'already has an iri', cls.iri)
-                    else:
-                        raise e
+                    if not hasattr(cls, 'iri'):
+                        cls.iri = rdflib.URIRef('file://' + cls.source)
+                    #else:
+                        #print(cls, 'already has an iri', cls.iri)
 
                 cls.source = Path(cls.source)
             else:
@@ -1402,11 +1630,8 @@ class Ont:
         if hasattr(self, '_repo') and not self._repo or working_dir is None:
             commit = 'FAKE-COMMIT'
         else:
-            import git
-            try:
-                repo = git.Repo(working_dir.as_posix())
-                commit = next(repo.iter_commits()).hexsha
-            except git.exc.InvalidGitRepositoryError:
+            commit = git_provenance.head(working_dir)
+            if commit is None:
                 commit = 'FAKE-COMMIT'
 
         try:
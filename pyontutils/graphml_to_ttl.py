@@ -39,6 +39,7 @@ abv = {
     'PolyLineEdge':"{http://www.yworks.com/xml/graphml}PolyLineEdge",
     'EdgeLabel':"{http://www.yworks.com/xml/graphml}EdgeLabel",
     'LineStyle':"{http://www.yworks.com/xml/graphml}LineStyle",
+    'Arrows':"{http://www.yworks.com/xml/graphml}Arrows",
 }
 
 edge_to_ttl = {
@@ -75,58 +76,83 @@ def by2(one, two, *rest):
 class Flatten:
     def __init__(self, filename):
         self.filename = os.path.splitext(os.path.basename(filename))[0]
-        parser = etree.XMLParser(remove_blank_text=True)
-        self.e = etree.parse(filename, parser)
-
-        self.namespaces = {k if k else '_':v for k, v in next(self.e.iter()).nsmap.items()}
-        self.xpath = self.mkx(self.e)
-
-    def mkx(self, element):
-        def xpath(path, e=element):
-            return e.xpath(path, namespaces=self.namespaces)
+        self._nodes, self._edges = self.parse(filename)
+
+    @staticmethod
+    def _text(element):
+        """ first text node of an element, equivalent to text()[1] """
+        if element is None:
+            return None
+        elif element.text is not None:
+            return element.text
+
+        for child in element:
+            if child.tail is not None:
+                return child.tail
+
+    @classmethod
+    def _first(cls, datas, tag, text=False):
+        for data in datas:
+            for element in data.iter(tag):
+                if not text:
+                    return element
+                elif cls._text(element) is not None:
+                    return element
+
+    @classmethod
+    def _record(cls, element):
+        """ record for a node or an edge read from its direct data children """
+        datas = list(element.iterchildren(abv['data']))
+        keyed = {data.get('key'):cls._text(data) for data in reversed(datas)}
+        if element.tag == abv['node']:
+            style = cls._first(datas, abv['BorderStyle'])
+            label = cls._text(cls._first(datas, abv['NodeLabel'], text=True))
+            return (element.get('id'),
+                    None if style is None else style.get('type'),
+                    None if style is None else style.get('width'),
+                    label,
+                    keyed.get('d5'),
+                    keyed.get('d4'))
+        else:
+            style = cls._first(datas, abv['LineStyle'])
+            arrows = cls._first(datas, abv['Arrows'])
+            source_a, target_a = ((None, None) if arrows is None else
+                                  (arrows.get('source'), arrows.get('target')))
+            label = cls._text(cls._first(datas, abv['EdgeLabel'], text=True))
+            return (element.get('id'),
+                    element.get('source'),
+                    element.get('target'),
+                    None if style is None else style.get('type'),
+                    None if style is None else style.get('width'),
+                    None if source_a == 'none' else source_a,
+                    None if target_a == 'none' else target_a,
+                    label,
+                    keyed.get('d9'),
+                    keyed.get('d8'))
+
+    @classmethod
+    def parse(cls, filename):
+        """ single iterparse pass over the document, nodes and edges are
+            returned in document order, see the key definition section of
+            a graphml file for the meaning of d4 d5 d8 and d9 """
+        records = {abv['node']:[], abv['edge']:[]}
+        stack = []
+        for event, element in etree.iterparse(filename, events=('start', 'end'),
+                                              tag=tuple(records), remove_blank_text=True):
+            if event == 'start':  # reserve the slot so nested group nodes keep document order
+                stack.append(len(records[element.tag]))
+                records[element.tag].append(None)
+            else:
+                records[element.tag][stack.pop()] = cls._record(element)
+                element.clear()
 
-        return xpath
+        return records[abv['node']], records[abv['edge']]
 
     def nodes(self):
-        # this works but would require a by_n function
-        #self.xpath('//_:node/@id|//_:node//y:BorderStyle/@type|'
-        #'//_:node//y:BorderStyle/@width|//_:node//y:NodeLabel/text()[1]')
-        for node in self.xpath('//_:node'):
-            xpath = self.mkx(node)
-            id, style_type, style_width, *label = xpath(
-                '@id|'
-                '_:data//y:BorderStyle/@type|'
-                '_:data//y:BorderStyle/@width|'
-                '_:data//y:NodeLabel/text()[1]'
-            )
-            # see key definition section of a graphml file for key defs
-            maybe_url = xpath('_:data[@key="d4"]/text()')
-            url = maybe_url[0] if maybe_url else None
-            maybe_desc = xpath('_:data[@key="d5"]/text()')
-            desc = maybe_desc[0] if maybe_desc else None
-            label, *_ = label if label else [None]
-            yield (id, style_type, style_width, label, desc, url)
+        yield from self._nodes
 
     def edges(self):
-        for edge in self.xpath('//_:edge'):
-            xpath = self.mkx(edge)
-            id, s, o, style_type, style_width, source_a, target_a, *label = xpath(
-                '@id|@source|@target|'
-                '_:data//y:LineStyle/@type|'
-                '_:data//y:LineStyle/@width|'
-                '_:data//y:Arrows/@source|'
-                '_:data//y:Arrows/@target|'
-                '_:data//y:EdgeLabel/text()'
-            )
-            # see key definition section of a graphml file for key defs
-            maybe_url = xpath('_:data[@key="d8"]/text()')
-            url = maybe_url[0] if maybe_url else None
-            maybe_desc = xpath('_:data[@key="d9"]/text()')
-            desc = maybe_desc[0] if maybe_desc else None
-            source_a = None if source_a == 'none' else source_a
-            target_a = None if target_a == 'none' else target_a
-            label, *_ = label if label else [None]
-            yield (id, s, o, style_type, style_width, source_a, target_a, label, desc, url)
+        yield from self._edges
 
 
 class TripleExport:
@@ -147,7 +173,7 @@ class TripleExport:
         yield from self.post()
 
     def graph(self, graph=Graph()):
-        [graph.add(t) for t in self.triples]
+        graph.addN((s, p, o, graph) for s, p, o in self.triples)
         self.post_graph(graph)
         out_mgraph = cull_prefixes(graph,
                                    prefixes={**dict(workflow=workflow, RRIDCUR=RRIDCUR),
@@ -466,40 +492,26 @@ def main():
 
     if args['workflow']:
         w = WorkflowMapping(args['<file>'])
-        [mgraph.g.add(t) for t in w.triples]
+        mgraph.g.addN((s, p, o, mgraph.g) for s, p, o in w.triples)
         w.post_graph(mgraph.g)
 
     elif args['paper']:
         w = PaperIdMapping(args['<file>'])
-        [mgraph.g.add(t) for t in w.triples]
+        mgraph.g.addN((s, p, o, mgraph.g) for s, p, o in w.triples)
         w.post_graph(mgraph.g)
 
     elif args['methods']:
-        parser = etree.XMLParser(remove_blank_text=True)
-        e = etree.parse(args['<file>'], parser)
-        #graph = e.find(abv['graph'])
-        nodes = xpath(e, '//'+abv['node'])
-        edges = xpath(e, '//'+abv['edge'])
+        f = Flatten(args['<file>'])
         node_dict = {}
-        for node in nodes:  # slow but who cares
-            id_ = node.get('id')
-            #label = xpath(node, '//'+abv['NodeLabel'])[0].text
-            idstr = '[@id="%s"]//' % id_
-            label = xpath(e, '//'+abv['node']+idstr+abv['NodeLabel'])[0].text
+        for id_, _, _, label, *_ in f.nodes():
             targets = []
             node_dict['FIXME:' + id_] = label, targets
 
         edge_dict = {}
         edge_types = set()
-        for edge in edges:
-            id_ = edge.get('id')
-            #print(id_)
-            idstr = '[@id="%s"]//' % id_
-            source = 'FIXME:' + edge.get('source')
-            target = 'FIXME:' + edge.get('target')
-            out = xpath(edge, '//'+abv['edge']+idstr+abv['EdgeLabel'])
-            edge_type = out[0].text if out else None
-            #print(edge_type)
+        for id_, source, target, *_, edge_type, _, _ in f.edges():
+            source = 'FIXME:' + source
+            target = 'FIXME:' + target
             edge_dict[id_] = source, target, edge_replace(edge_type)
             edge_types.add(edge_type)
 
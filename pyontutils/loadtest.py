@@ -0,0 +1,210 @@
+""" Asyncio engine behind ontutils deadlinks and scigraph-stress.
+
+    Requests share a global token bucket and a connection pool with a per
+    host limit. HEAD requests that fail are retried as GET and each url is
+    requested at most once per LoadTester. Results are summarized as
+    latency percentiles, a log scale latency histogram and status counts
+    that can be written as json.
+"""
+
+import json
+import asyncio
+from time import perf_counter
+from urllib.parse import urlsplit
+from collections import Counter, defaultdict, namedtuple
+import aiohttp
+from pyontutils.utils import makeSimpleLogger
+
+log = makeSimpleLogger('loadtest')
+
+
+class Result(namedtuple('Result', ['url', 'method', 'status', 'seconds', 'error'])):
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        return self.status is not None and self.status < 400
+
+
+class TokenBucket:
+    """ at most rate requests per second across all requests with no more
+        than burst saved up while idle, a rate of zero is no limit """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.last = perf_counter()
+        self._lock = None
+
+    async def take(self):
+        if not self.rate:
+            return
+
+        if self._lock is None:  # has to be created inside the running loop
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            while True:
+                now = perf_counter()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+                self.last = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class Histogram:
+    """ latencies with exact percentiles and power of two millisecond buckets """
+
+    def __init__(self):
+        self.latencies = []
+
+    def record(self, seconds):
+        self.latencies.append(seconds)
+
+    def percentile(self, q):
+        if not self.latencies:
+            return None
+        latencies = sorted(self.latencies)
+        return latencies[int(round(q * (len(latencies) - 1)))]
+
+    def buckets(self):
+        """ [[upper bound in ms, count], ...] for the non empty buckets """
+        counts = Counter()
+        for seconds in self.latencies:
+            upper = 1
+            while upper < seconds * 1000:
+                upper *= 2
+            counts[upper] += 1
+
+        return [[upper, counts[upper]] for upper in sorted(counts)]
+
+    def stats(self):
+        n = len(self.latencies)
+        return {'count': n,
+                'mean': sum(self.latencies) / n if n else None,
+                'max': max(self.latencies) if n else None,
+                'p50': self.percentile(.5),
+                'p90': self.percentile(.9),
+                'p99': self.percentile(.99),
+                'histogram_ms': self.buckets()}
+
+
+class LoadTester:
+    """ request many urls concurrently, see run and report """
+
+    def __init__(self, rate=0, timeout=5, method='head', limit=100, limit_per_host=10,
+                 fallback=True):
+        self.bucket = TokenBucket(rate)
+        self.timeout = timeout
+        self.method = method.upper()
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.fallback = fallback
+        self.cache = {}
+        self.cache_hits = 0
+        self.results = []
+        self.seconds = 0
+
+    async def _request(self, session, method, url):
+        # wait for a slot before starting the clock so that latencies
+        # do not include time spent queued behind other requests, the
+        # host slot comes first so a busy host cannot hold global slots
+        async with self._host_slots[urlsplit(url).netloc], self._slots:
+            await self.bucket.take()
+            start = perf_counter()
+            status = error = None
+            try:
+                async with session.request(method, url, allow_redirects=method != 'HEAD') as response:
+                    status = response.status
+                    if method != 'HEAD':
+                        await response.read()
+            except asyncio.TimeoutError:
+                error = 'timeout'
+            except (aiohttp.ClientError, ValueError) as e:
+                error = e.__class__.__name__
+
+        result = Result(url, method, status, perf_counter() - start, error)
+        self.results.append(result)
+        return result
+
+    async def _fetch(self, session, url):
+        result = await self._request(session, self.method, url)
+        if self.fallback and self.method == 'HEAD' and not result.ok and result.error != 'timeout':
+            # plenty of servers reject or mishandle HEAD
+            result = await self._request(session, 'GET', url)
+
+        if not result.ok:
+            log.debug(f'{result.status or result.error} {url}')
+
+        return result
+
+    async def _get(self, session, url):
+        if url in self.cache:
+            self.cache_hits += 1
+            cached = self.cache[url]
+            return cached if isinstance(cached, Result) else await cached
+
+        self.cache[url] = future = asyncio.ensure_future(self._fetch(session, url))
+        return await future
+
+    async def _run(self, urls):
+        self._slots = asyncio.Semaphore(self.limit)
+        self._host_slots = defaultdict(lambda: asyncio.Semaphore(self.limit_per_host))
+        connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host)
+        timeout = aiohttp.ClientTimeout(sock_connect=self.timeout, sock_read=self.timeout)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            return await asyncio.gather(*(self._get(session, url) for url in urls))
+
+    def run(self, urls):
+        """ final Result for each url in order, a url is only requested
+            once even if it appears again here or in a later run """
+        loop = asyncio.new_event_loop()
+        start = perf_counter()
+        try:
+            out = loop.run_until_complete(self._run(urls))
+        finally:
+            # futures are bound to this loop so keep only finished results
+            self.cache = {url: cached if isinstance(cached, Result) else cached.result()
+                          for url, cached in self.cache.items()
+                          if isinstance(cached, Result) or
+                          cached.done() and not cached.cancelled() and cached.exception() is None}
+            loop.close()
+
+        self.seconds += perf_counter() - start
+        return out
+
+    def report(self):
+        """ json serializable summary of every request made """
+        histogram = Histogram()
+        statuses = Counter()
+        methods = defaultdict(Counter)
+        hosts = defaultdict(lambda: (Histogram(), Counter()))
+        for r in self.results:
+            key = str(r.status) if r.error is None else r.error
+            histogram.record(r.seconds)
+            statuses[key] += 1
+            methods[r.method][key] += 1
+            host_histogram, host_statuses = hosts[urlsplit(r.url).netloc]
+            host_histogram.record(r.seconds)
+            host_statuses[key] += 1
+
+        final = list(self.cache.values())
+        return {'requests': len(self.results),
+                'urls': len(final),
+                'cache_hits': self.cache_hits,
+                'seconds': self.seconds,
+                'rate': len(self.results) / self.seconds if self.seconds else None,
+                'latency': histogram.stats(),
+                'statuses': dict(statuses),
+                'methods': {m: dict(c) for m, c in methods.items()},
+                'hosts': {host: {**h.stats(), 'statuses': dict(c)}
+                          for host, (h, c) in sorted(hosts.items())},
+                'failed': sorted(r.url for r in final if not r.ok)}
+
+    def write(self, path):
+        with open(path, 'wt') as f:
+            json.dump(self.report(), f, indent=2)
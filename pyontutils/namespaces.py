@@ -4,6 +4,7 @@ import rdflib
 import requests
 from ontquery.terms import OntCuries
 from pyontutils.config import devconfig
+from pyontutils.utils import QnameResolver
 
 
 def interlex_namespace(user):
@@ -203,6 +204,15 @@ PREFIXES = _loadPrefixes()
 
 OntCuries(PREFIXES)  # anything importing this file should see these bindings
 
+def _qnames():
+    graph = rdflib.Graph()  # bind in order so that default and duplicate prefixes match makeGraph
+    for prefix, namespace in PREFIXES.items():
+        graph.bind(prefix, namespace)
+
+    return QnameResolver.from_graph(graph)
+
+qnames = _qnames()  # shared resolver for PREFIXES
+
 def makePrefixes(*prefixes):
     return {k:PREFIXES[k] for k in prefixes}
 
@@ -70,6 +70,7 @@ from pyontutils.utils_extra import memoryCheck
 from pyontutils.namespaces import getCuries
 from pyontutils.namespaces import makePrefixes, definition  # TODO make prefixes needs an all...
 from pyontutils.hierarchies import creatTree
+from pyontutils.scigraph_local import LocalGraph
 from pyontutils.closed_namespaces import rdf, rdfs, owl, skos, oboInOwl, dc
 from IPython import embed
 
@@ -545,17 +546,21 @@ def normalize_prefixes(graph, curies):
     return mg, ng_
 
 def import_tree(graph, ontologies, **kwargs):
+    mg = makeGraph('', graph=graph)
+    mg.add_known_namespaces('owl', 'obo', 'dc', 'dcterms', 'dctypes', 'skos', 'NIFTTL')
+    # index once and only walk the import chain of each ontology
+    local = LocalGraph(graph)
+    for node in set(e for t in graph.subject_objects(owl.imports) for e in t):
+        local.labels.setdefault(node, str(node))  # ontologies are named by iri
+
     for ontology in ontologies:
         thisfile = Path(ontology).name
         print(thisfile)
-        mg = makeGraph('', graph=graph)
-        mg.add_known_namespaces('owl', 'obo', 'dc', 'dcterms', 'dctypes', 'skos', 'NIFTTL')
-        j = mg.make_scigraph_json('owl:imports', direct=True)
         try:
-            t, te = creatTree(*Query(f'NIFTTL:{thisfile}', 'owl:imports', 'OUTGOING', 30), json=j, prefixes=mg.namespaces, **kwargs)
+            t, te = creatTree(*Query(f'NIFTTL:{thisfile}', 'owl:imports', 'OUTGOING', 30), graph=local, prefixes=mg.namespaces, **kwargs)
             #print(t)
             yield t, te
-        except KeyError:
+        except (KeyError, ValueError):
             print(tc.red('WARNING:'), 'could not find', ontology, 'in import chain')  # TODO zap onts w/o imports
 
 def for_burak(ng_):
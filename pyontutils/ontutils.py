@@ -27,22 +27,26 @@ Options:
     -r --rate=Hz                    rate in Hz for requests, zero is no limit  [default: 20]
     -t --timeout=SECONDS            timeout in seconds for deadlinks requests  [default: 5]
     -f --fetch                      fetch catalog extras from their remote location
-    -d --debug                      call IPython embed when done
+    -d --debug                      call IPython embed when done for spell
+                                    print the json report for deadlinks and scigraph-stress
     -v --verbose                    verbose output
     -w --write                      write devconfig file
 """
 import os
+import re
+import json
 from glob import glob
 from time import time, localtime, strftime
-from random import shuffle
 from pathlib import Path
 import rdflib
+from rdflib.plugins.parsers.notation3 import RDFSink, SinkParser
 import requests
 from joblib import Parallel, delayed
 from git.repo import Repo
 from pyontutils.core import makeGraph, createOntology
 from pyontutils.utils import noneMembers, anyMembers, Async, deferred, TermColors as tc
 from pyontutils.ontload import loadall
+from pyontutils.loadtest import LoadTester
 from pyontutils.namespaces import getCuries
 from pyontutils.namespaces import makePrefixes, definition
 from pyontutils.closed_namespaces import rdf, rdfs, owl, skos
@@ -69,25 +73,28 @@ def do_file(filename, swap, *args):
     return reps
 
 def switchURIs(g, swap, *args):
+    """ swap is called once per distinct uri and the resulting
+        mapping is applied to the whole graph in a single pass """
     if len(args) > 1:  # FIXME hack!
         _, fragment_prefixes = args
     reps = []
     prefs = {None}
+    mapping = {}
     addpg = makeGraph('', graph=g)
-    for t in g:
-        nt, ireps, iprefs = tuple(zip(*swap(t, *args)))
-        if t != nt:
-            g.remove(t)
-            g.add(nt)
-
-        for rep in ireps:
-            if rep is not None:
-                reps.append(rep)
-
-        for pref in iprefs:
-            if pref not in prefs:
-                prefs.add(pref)
-                addpg.add_known_namespaces(fragment_prefixes[pref])
+    for uri in set(e for t in g for e in t if isinstance(e, rdflib.URIRef)):
+        (new, rep, pref), = swap((uri,), *args)
+        if new != uri:
+            mapping[uri] = new
+
+        if rep is not None:
+            reps.append(rep)
+
+        if pref not in prefs:
+            prefs.add(pref)
+            addpg.add_known_namespaces(fragment_prefixes[pref])
+
+    counts = addpg.replace_urirefs(mapping)
+    print('replaced', sum(counts.values()), 'occurrences of', len(counts), 'uris')
     return reps
 
 class ontologySection:
@@ -112,6 +119,80 @@ class ontologySection:
     def __exit__(self, exc_type, exc_value, traceback):
         self.write()
 
+def read_header(filename):
+    """ the bytes before the first ### section marker without reading the rest of the file """
+    header = []
+    with open(filename, 'rb') as f:
+        for line in f:
+            if b'###' in line:
+                header.append(line.split(b'###', 1)[0])
+                break
+
+            header.append(line)
+
+    return b''.join(header)
+
+def graph_versions(graph):
+    """ [ontology, versionIRI] pairs, versionIRI is None if there is none """
+    return sorted([str(ont), str(versionIRI) if versionIRI is not None else None]
+                  for ont in graph.subjects(rdf.type, owl.Ontology)
+                  for versionIRI in (list(graph.objects(ont, owl.versionIRI)) or [None]))
+
+def header_versions(filename):
+    """ [ontology, versionIRI] pairs from the ontology header of filename """
+    return graph_versions(rdflib.Graph().parse(data=read_header(filename), format='turtle'))
+
+class HeaderIndex:
+    """ versionIRIs from the ontology headers of ttl files. Stale or missing
+        entries are parsed in parallel and entries are cached by mtime. """
+
+    cache = Path('~/.cache/pyontutils/ontology-headers.json').expanduser()
+
+    def __init__(self, cache=None, n_jobs=9):
+        if cache is not None:
+            self.cache = Path(cache)
+
+        self.n_jobs = n_jobs
+        self.index = {}
+        if self.cache.exists():
+            with open(self.cache, 'rt') as f:
+                self.index = json.load(f)
+
+    @staticmethod
+    def _key(filename):
+        path = Path(filename).resolve()
+        return path.as_posix(), path.stat().st_mtime_ns
+
+    def add(self, filename, versions):
+        key, mtime = self._key(filename)
+        self.index[key] = [mtime, versions]
+
+    def update(self, *filenames):
+        stale = [filename for filename in filenames
+                 for key, mtime in (self._key(filename),)
+                 if key not in self.index or self.index[key][0] != mtime]
+        if not stale:
+            return
+
+        for filename, versions in zip(stale, Parallel(n_jobs=self.n_jobs)(
+                delayed(header_versions)(f) for f in stale)):
+            self.add(filename, versions)
+
+        self.write()
+
+    def write(self):
+        self.cache.parent.mkdir(parents=True, exist_ok=True)
+        temp = self.cache.with_suffix('.tmp')
+        with open(temp, 'wt') as f:
+            json.dump(self.index, f)
+
+        temp.replace(self.cache)
+
+    def versions(self, *filenames):
+        """ {filename: [[ontology, versionIRI], ...]} """
+        self.update(*filenames)
+        return {filename: self.index[self._key(filename)[0]][1] for filename in filenames}
+
 #
 # utils
 
@@ -151,28 +232,10 @@ def spell(filenames, debug=False):
         raise ImportError('hunspell is not installed on your system. If you want '
                           'to run `ontutils spell` please run pipenv install --dev --skip-lock. '
                           'You will need the development libs for hunspell on your system.')
-    spell_objects = (u for r in Parallel(n_jobs=9)(delayed(get_spells)(f) for f in filenames) for u in r)
-    hobj = hunspell.HunSpell('/usr/share/hunspell/en_US.dic', '/usr/share/hunspell/en_US.aff')
-    #nobj = hunspell.HunSpell(os.path.expanduser('~/git/domain_wordlists/neuroscience-en.dic'), '/usr/share/hunspell/en_US.aff')  # segfaults without aff :x
     collect = set()
-    for filename, s, p, o in spell_objects:
-        missed = False
-        no = []
-        for line in o.split('\n'):
-            nline = []
-            for tok in line.split(' '):
-                prefix, tok, suffix = tokstrip(tok)
-                #print((prefix, tok, suffix))
-                if not hobj.spell(tok):# and not nobj.spell(tok):
-                    missed = True
-                    collect.add(tok)
-                    nline.append(prefix + tc.red(tok) + suffix)
-                else:
-                    nline.append(prefix + tok + suffix)
-            line = ' '.join(nline)
-            no.append(line)
-        o = '\n'.join(no)
-        if missed:
+    for misses, tokens in Parallel(n_jobs=-1)(delayed(spell_file)(f) for f in filenames):
+        collect.update(tokens)
+        for filename, s, o in misses:
             #print(filename, s, o)
             print('>>>', o)
 
@@ -183,69 +246,108 @@ def spell(filenames, debug=False):
 _bads = (',', ';', ':', '"', "'", '(', ')', '[',']','{','}',
          '.', '-', '/',  '\\t', '\\n', '\\', '%', '$', '*',
          '`', '#', '@', '=', '?', '|', '<', '>', '+', '~')
+_bad = '(?:' + '|'.join(re.escape(b) for b in sorted(_bads, key=len, reverse=True)) + ')*'
+_tokstrip = re.compile(f'^({_bad})(.*?)({_bad})$', re.DOTALL)
 def tokstrip(tok, side=None):
-    front = ''
-    back = ''
-    for bad in _bads:
-        if side is None or True:
-            ftok = tok[1:] if tok.startswith(bad) else tok
-            if ftok != tok:
-                front = front + bad
-                f, tok = tokstrip(ftok, True)
-                front = front + f
-        if side is None or False:
-            btok = tok[:1] if tok.endswith(bad) else tok
-            if btok != tok:
-                back = bad + back
-                tok, b = tokstrip(btok, False)
-                back = b + back
+    front, tok, back = _tokstrip.match(tok).groups()
     if side is None:
         return front, tok, back
     elif side:
-        return front, tok
+        return front, tok + back
     else:
-        return tok, back
+        return front + tok, back
+
+
+class _SpellSink(RDFSink):
+    """ keep only statements whose predicate is in predicates
+        instead of adding every triple to a graph """
+
+    def __init__(self, predicates):
+        super().__init__(rdflib.Graph())
+        self.predicates = predicates
+        self.statements = []
+
+    def makeStatement(self, quadruple, why=None):
+        f, p, s, o = quadruple
+        p = self.normalise(f, p)
+        if p in self.predicates:
+            self.statements.append((self.normalise(f, s), p, self.normalise(f, o)))
 
 
 def get_spells(filename):
-    check_spelling = {skos.definition, definition, rdfs.comment}
-    return [(filename, s, p, o) for s, p, o in rdflib.Graph().parse(filename, format='turtle') if p in check_spelling]
+    sink = _SpellSink({skos.definition, definition, rdfs.comment})
+    parser = SinkParser(sink, baseURI=Path(filename).resolve().as_uri(), turtle=True)
+    with open(filename, 'rb') as f:
+        parser.loadStream(f)
+
+    return [(filename, s, p, o) for s, p, o in sink.statements]
+
+_hobj = None
+_spelled = {}
+def spell_token(tok):
+    """ cached per process so each worker only asks hunspell once per token """
+    global _hobj
+    if tok not in _spelled:
+        if _hobj is None:
+            _hobj = hunspell.HunSpell('/usr/share/hunspell/en_US.dic', '/usr/share/hunspell/en_US.aff')
+            #nobj = hunspell.HunSpell(os.path.expanduser('~/git/domain_wordlists/neuroscience-en.dic'), '/usr/share/hunspell/en_US.aff')  # segfaults without aff :x
+
+        _spelled[tok] = not tok or _hobj.spell(tok)  # and nobj.spell(tok)
+
+    return _spelled[tok]
+
+def spell_file(filename, check=spell_token):
+    """ returns (filename, s, highlighted o) for literals with misspellings
+        and the set of misspelled tokens """
+    misses = []
+    tokens = set()
+    for filename, s, p, o in get_spells(filename):
+        missed = False
+        no = []
+        for line in o.split('\n'):
+            nline = []
+            for tok in line.split(' '):
+                prefix, tok, suffix = tokstrip(tok)
+                if not check(tok):
+                    missed = True
+                    tokens.add(tok)
+                    nline.append(prefix + tc.red(tok) + suffix)
+                else:
+                    nline.append(prefix + tok + suffix)
+            no.append(' '.join(nline))
+        if missed:
+            misses.append((filename, s, '\n'.join(no)))
 
-def scigraph_stress(rate, timeout=5, verbose=False, debug=False, scigraph=devconfig.scigraph_api):
+    return misses, tokens
+
+def scigraph_stress(rate, timeout=5, verbose=False, debug=False, scigraph=devconfig.scigraph_api, output=None):
     # TODO use the api classes
     with open((Path(devconfig.resources) / 'chebi-subset-ids.txt').as_posix(), 'rt') as f:
         urls = [os.path.join(scigraph, f'vocabulary/id/{curie.strip()}') for curie in f.readlines()]
     print(urls)
-    url_blaster(urls, rate, timeout, verbose, debug)
+    url_blaster(urls, rate, timeout, verbose, debug, output=output)
 
-def deadlinks(filenames, rate, timeout=5, verbose=False, debug=False):
+def deadlinks(filenames, rate, timeout=5, verbose=False, debug=False, output=None):
     urls = list(set(u for r in Parallel(n_jobs=9)(delayed(furls)(f) for f in filenames) for u in r))
-    url_blaster(urls, rate, timeout, verbose, debug)
+    url_blaster(urls, rate, timeout, verbose, debug, output=output)
 
-def url_blaster(urls, rate, timeout=5, verbose=False, debug=False, method='head', fail=False, negative=False):
-    shuffle(urls)  # try to distribute timeout events evenly across workers
+def url_blaster(urls, rate, timeout=5, verbose=False, debug=False, method='head', fail=False, negative=False, output=None):
     if verbose:
         [print(u) for u in sorted(urls)]
 
-    class Timedout:
-        ok = False
-        def __init__(self, url):
-            self.url = url
+    tester = LoadTester(rate=rate, timeout=timeout, method=method)
+    all_ = tester.run(urls)
+    report = tester.report()
+    if output:
+        tester.write(output)
 
-    r_method = getattr(requests, method)
-    def method_timeout(url, _method=r_method):
-        try:
-            return _method(url, timeout=timeout)
-        except (requests.ConnectTimeout, requests.ReadTimeout) as e:
-            print('Timedout:', url, e)
-            return Timedout(url)
-    s = time()
-    collector = [] if debug else None
-    all_ = Async(rate=rate, debug=verbose, collector=collector)(deferred(method_timeout)(url) for url in urls)
-    o = time()
     not_ok = [_.url for _ in all_ if not _.ok]
-    d = o - s
+    d = report['seconds']
+    latency = report['latency']
     print(f'Actual time: {d}    Effective rate: {len(urls) / d}Hz    diff: {(len(urls) / d) / rate if rate else 1}')
+    if latency['count']:
+        print(f'Latency p50: {latency["p50"]:.3f}s    p90: {latency["p90"]:.3f}s    p99: {latency["p99"]:.3f}s')
+    print('Statuses:', ' '.join(f'{k}: {v}' for k, v in sorted(report['statuses'].items())))
     print('Failed:')
     if not_ok:
         for nok in not_ok:
@@ -264,59 +366,46 @@ def url_blaster(urls, rate, timeout=5, verbose=False, debug=False, method='head'
     else:
         print(f'OK. All {len(urls)} urls passed! :D')
     if debug:
-        from matplotlib.pyplot import plot, savefig, figure, show, legend, title
-        from collections import defaultdict
-        def asyncVis(collector):
-            by_thread = defaultdict(lambda: [[], [], [], [], [], [], [], []])
-            min_ = 0
-            for thread, job, start, target_stop, stop, time_per_job, p, i, d in sorted(collector):
-                if not min_:
-                    min_ = stop
-                by_thread[thread][0].append(job)
-                #by_thread[thread][1].append(start - min_)
-                by_thread[thread][2].append(target_stop - stop)
-                by_thread[thread][3].append(stop - min_)
-                by_thread[thread][4].append(time_per_job)
-                by_thread[thread][5].append(p)
-                by_thread[thread][6].append(i)
-                by_thread[thread][7].append(d)
-
-            for thread, (job, y1, y2, y3, y4, y5, y6, y7) in by_thread.items():
-                figure()
-                title(str(thread))
-                plot(job, [0] * len(job), 'r-')
-                #plot(job, y1, label=f'stop')
-                plot(job, y2, label=f'early by')
-                #plot(job, y3, label=f'stop')
-                #plot(job, y4, label=f'time per job')  # now constant...
-                plot(job, y5, label='P')
-                plot(job, y6, label='I')
-                plot(job, y7, label='D')
-                legend()
-            show()
-        asyncVis(collector)
-        embed()
+        print(json.dumps(report, indent=2))
+
+    return report
 
 
 def furls(filename):
     return set(url for t in rdflib.Graph().parse(filename, format='turtle')
                for url in t if isinstance(url, rdflib.URIRef) and not url.startswith('file://'))
 
-def version_iris(*filenames, epoch=None):
+def version_iris(*filenames, epoch=None, index=None):
     # TODO make sure that when we add versionIRIs the files we are adding them to are either unmodified or in the index
     if epoch is None:
         epoch = int(time())
-    Parallel(n_jobs=9)(delayed(version_iri)(f, epoch) for f in filenames)
+    if index is None:
+        index = HeaderIndex()
+
+    # only rewrite files whose header does not already have this epoch
+    todo = [filename for filename, versions in index.versions(*filenames).items()
+            if not versions or any(v != _version_iri(o, epoch) for o, v in versions)]
+    for filename, versions in zip(todo, Parallel(n_jobs=9)(delayed(version_iri)(f, epoch)
+                                                           for f in todo)):
+        index.add(filename, versions)
+
+    if todo:
+        index.write()
 
 def version_iri(filename, epoch):
     with ontologySection(filename) as ont:
         add_version_iri(ont.graph, epoch)
 
-def make_version_iri_from_iri(iri, epoch):
+    return graph_versions(ont.graph)
+
+def _version_iri(iri, epoch):
     base = os.path.dirname(iri)
     basename = os.path.basename(iri)
     name, ext = os.path.splitext(basename)
-    newiri = f'{base}/{name}/version/{epoch}/{basename}'
+    return f'{base}/{name}/version/{epoch}/{basename}'
+
+def make_version_iri_from_iri(iri, epoch):
+    newiri = _version_iri(iri, epoch)
     print(newiri)
     return rdflib.URIRef(newiri)
 
@@ -349,21 +438,24 @@ def make_git_commit_command(git_local, repo_name):
     commit_epoch = min_epoch
     print(f'git commit --date {commit_epoch}{zoneoffset}')
 
-def get_epoch(*filenames, min_=True):
+def get_epoch(*filenames, min_=True, index=None):
+    if index is None:
+        index = HeaderIndex()
+
     comp_epoch = None
-    for f in filenames:
-        graph = ontologySection(f).graph
-        for ont in graph.subjects(rdf.type, owl.Ontology):
-            for versionIRI in graph.objects(ont, owl.versionIRI):
-                base, epoch, filename = versionIRI.rsplit('/', 2)
-                epoch = int(epoch)
-                print(epoch)
-                if comp_epoch is None:
-                    comp_epoch = epoch
-                elif min_ and epoch < comp_epoch:
-                    comp_epoch = epoch
-                elif not min_ and epoch > comp_epoch:
-                    comp_epoch = epoch
+    for versions in index.versions(*filenames).values():
+        for ont, versionIRI in versions:
+            if versionIRI is None:
+                continue
+            base, epoch, filename = versionIRI.rsplit('/', 2)
+            epoch = int(epoch)
+            print(epoch)
+            if comp_epoch is None:
+                comp_epoch = epoch
+            elif min_ and epoch < comp_epoch:
+                comp_epoch = epoch
+            elif not min_ and epoch > comp_epoch:
+                comp_epoch = epoch
     print('min' if min_ else 'max', comp_epoch)
     if comp_epoch is None:
         if min_:
@@ -669,7 +761,6 @@ def backend_refactor_values():
     return ureps
 
 def swapBackend(trip, ureps):
-    print(ureps)
     for spo in trip:
         if spo in ureps:
             new_spo = ureps[spo]
@@ -781,9 +872,11 @@ def main():
     elif args['version-iri']:
         version_iris(*filenames, epoch=epoch)
     elif args['scigraph-stress']:
-        scigraph_stress(int(args['--rate']), int(args['--timeout']), verbose, debug)
+        scigraph_stress(int(args['--rate']), int(args['--timeout']), verbose, debug,
+                        output=args['--output-file'])
     elif args['deadlinks']:
-        deadlinks(filenames, int(args['--rate']), int(args['--timeout']), verbose, debug)
+        deadlinks(filenames, int(args['--rate']), int(args['--timeout']), verbose, debug,
+                  output=args['--output-file'])
     elif args['spell']:
         spell(filenames, debug)
     elif args['iri-commit']:
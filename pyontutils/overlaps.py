@@ -5,12 +5,15 @@ Usage:
     overlaps [options] <file>...
 
 Options:
-    -h --help       print this
-    -v --verbose    do something fun!
+    -h --help             print this
+    -v --verbose          do something fun!
+    -j --jobs=NJOBS       number of parallel parsing jobs [default: 8]
 
 """
 
 import os
+from itertools import combinations
+from collections import defaultdict
 import rdflib
 from docopt import docopt
 from pyontutils.core import makeGraph
@@ -27,10 +30,60 @@ def g(filename):
 def sn(filename):
     return os.path.splitext(os.path.basename(filename))[0].split('-', 1)[-1]
 
+def shareable(filename):
+    """ Parse a file and return only what is needed to compute overlaps,
+        its namespaces and the triples that have a URIRef subject. """
+    graph = rdflib.Graph().parse(filename, format='turtle')
+    return (tuple(graph.namespaces()),
+            frozenset(t for t in graph if isinstance(t[0], rdflib.URIRef)))
+
+def index(triple_sets):
+    """ Build an inverted index from each triple to the ids of the sets that
+        contain it in a single pass, keeping only triples that are shared. """
+    idx = defaultdict(list)
+    for i, triples in enumerate(triple_sets):
+        for t in triples:
+            idx[t].append(i)
+
+    return {t:ids for t, ids in idx.items() if len(ids) > 1}
+
+def pairs(idx):
+    """ pairwise overlaps from an inverted index, cost is linear in the
+        size of the output rather than in the number of pairs of files """
+    out = defaultdict(list)
+    for t, ids in idx.items():
+        for pair in combinations(ids, 2):
+            out[pair].append(t)
+
+    return out
+
 def comb(members):
-    return {n1 + '-' + n2 : common(g1, g2)
-            for i, (n1, g1) in enumerate(sorted(members.items()))
-            for n2, g2 in sorted(members.items())[i+1:]}
+    """ members is a dict of name -> makeGraph, same output as calling
+        common on every pair but computed from a single inverted index """
+    names, graphs = zip(*sorted(members.items())) if members else ((), ())
+    idx = index(set(t for t in gr.g if isinstance(t[0], rdflib.URIRef)) for gr in graphs)
+    return details(names, graphs, pairs(idx))
+
+def details(names, graphs, overlaps):
+    def qname(i, t):
+        # qname with the namespaces of the first member of the pair as in common
+        key = i, t
+        if key not in memo:
+            s, p, o = t
+            memo[key] = tuple(map(graphs[i].qname,
+                                  (s, p, str(o.toPython()) if isinstance(o, rdflib.Literal) else o)))
+        return memo[key]
+
+    memo = {}
+    results = {n1 + '-' + n2:[] for i, n1 in enumerate(names) for n2 in names[i + 1:]}
+    for (i, j), triples in overlaps.items():
+        results[names[i] + '-' + names[j]] = sorted(qname(i, t) for t in triples)
+
+    return results
+
+def counts(names, overlaps):
+    return {names[i] + '-' + names[j]:len(triples)
+            for (i, j), triples in sorted(overlaps.items())}
 
 def extract(files, graphs):
     fn_graphs = {sn(f):g for f, g in zip(files, graphs)}
@@ -42,10 +95,24 @@ def extract(files, graphs):
 def main():
     from joblib import Parallel, delayed
     args = docopt(__doc__, version = "overlaps 0")
-    files = args['<file>']
-    graphs = Parallel(n_jobs=8)(delayed(g)(f) for f in files)
-    extract(files, graphs)
+    files = sorted(args['<file>'], key=sn)
+    parsed = Parallel(n_jobs=int(args['--jobs']))(delayed(shareable)(f) for f in files)
+    names = [sn(f) for f in files]
+    graphs = []
+    for namespaces, _ in parsed:
+        graph = rdflib.Graph()
+        [graph.bind(p, n) for p, n in namespaces]
+        graphs.append(makeGraph('', graph=graph))
+
+    overlaps = pairs(index(triples for _, triples in parsed))
+    for pair, count in counts(names, overlaps).items():
+        print(count, pair)
+
+    if args['--verbose']:
+        results = details(names, graphs, overlaps)
+        overlaps = {k:v for k, v in results.items() if v}
+        no_bri_inf = {k:v for k, v in overlaps.items() if '-Infe' not in k and '-Bridge' not in k}
+        embed()
 
 if __name__ == '__main__':
     main()
-
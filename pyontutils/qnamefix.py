@@ -15,16 +15,20 @@ Options:
     -v --verbose    do something fun!
     -s --slow       do not use a process pool
     -n --nowrite    parse the file and reserialize it but do not write changes
+    -j --jobs=NJOBS number of worker processes [default: 0] 0 uses all cores
 
 """
 
 import os
 import sys
 from glob import glob
+from time import time
+from multiprocessing import Pool
 import rdflib
 from docopt import docopt
 import ttlser.ttlfmt
-from pyontutils.core import makeGraph, cull_prefixes
+from pyontutils.core import makeGraph, cull_prefixes, cull_prefixes_inplace
+from pyontutils.utils import PrefixTrie
 from ttlser.utils import readFromStdIn
 from ttlser.ttlfmt import parse, prepare
 from pyontutils.namespaces import PREFIXES as uPREFIXES
@@ -33,6 +37,16 @@ PREFIXES = {k:v for k, v in uPREFIXES.items() if k != 'NIFTTL'}
 
 exclude = 'generated/swanson_hierarchies.ttl', 'generated/NIF-NIFSTD-mapping.ttl'
 
+_trie = None
+
+def get_trie():
+    """ the prefix trie for PREFIXES is built once per process """
+    global _trie
+    if _trie is None:
+        _trie = PrefixTrie(PREFIXES)
+
+    return _trie
+
 def serialize(graph, outpath):
     def prefix_cleanup(ps, graph):
         if 'parcellation/' in outpath:
@@ -60,20 +74,47 @@ def serialize(graph, outpath):
             ps.pop('NIFGA')
 
     pc = prefix_cleanup if isinstance(outpath, str) else lambda a, b: None
-    graph = cull_prefixes(graph, cleanup=pc)
+    # the parsed graph is not used again so cull in place instead of copying
+    graph = cull_prefixes_inplace(graph, prefixes=PREFIXES, cleanup=pc, trie=get_trie())
 
     out = graph.g.serialize(format='nifttl', gen_prefix=bool(PREFIXES))
-    if not isinstance(outpath, str):  # FIXME not a good test that it is stdout
+    if ttlser.ttlfmt.args['--nowrite']:
+        pass
+    elif not isinstance(outpath, str):  # FIXME not a good test that it is stdout
         outpath.buffer.write(out)
     else:
         with open(outpath, 'wb') as f:
             f.write(out)
 
+    return len(graph.g), len(out)
+
 def convert(file_or_stream, stream=False):
+    """ parse, cull, and serialize in the same process, returns
+        (file, triple count, bytes written, seconds) """
     if file_or_stream in exclude:
-        print('skipping', file)
-        return file
-    serialize(*parse(**prepare(file_or_stream, stream=stream)))
+        print('skipping', file_or_stream)
+        return file_or_stream, 0, 0, 0
+    start = time()
+    ntriples, nbytes = serialize(*parse(**prepare(file_or_stream, stream=stream)))
+    return file_or_stream, ntriples, nbytes, time() - start
+
+def _init_worker(args, prefixes):
+    """ workers need the parent's args and exclusions, trie is built on first use """
+    global PREFIXES
+    ttlser.ttlfmt.args = args
+    PREFIXES = prefixes
+
+def report(results, elapsed):
+    tt = tb = 0
+    for file, ntriples, nbytes, seconds in results:
+        if seconds:
+            print(f'{ntriples / seconds:>10.0f} triples/s {nbytes / seconds / 1024:>8.0f} KiB/s {file}')
+        tt += ntriples
+        tb += nbytes
+
+    print(f'{len(results)} files {tt} triples {tb} bytes in {elapsed:.2f}s')
+    if elapsed:
+        print(f'{tt / elapsed:>10.0f} triples/s {tb / elapsed / 1024:>8.0f} KiB/s total')
 
 def main():
     global PREFIXES
@@ -84,8 +125,9 @@ def main():
         for k in list(PREFIXES):
             PREFIXES.pop(k)
     else:
-        for x in args['--exclude'] and x in PREFIXES:
-            PREFIXES.pop(x)
+        for x in args['--exclude']:
+            if x in PREFIXES:
+                PREFIXES.pop(x)
     if not args['<file>']:
         stdin = readFromStdIn(sys.stdin)
         if stdin is not None:
@@ -93,11 +135,19 @@ def main():
         else:
             print(__doc__)
     else:
-        if args['--slow'] or len(args['<file>']) == 1:
-            [convert(f) for f in args['<file>']]
+        files = args['<file>']
+        start = time()
+        if args['--slow'] or len(files) == 1:
+            results = [convert(f) for f in files]
         else:
-            from joblib import Parallel, delayed
-            Parallel(n_jobs=9)(delayed(convert)(f) for f in args['<file>'])
+            jobs = int(args['--jobs'])
+            max_workers = min(jobs if jobs > 0 else os.cpu_count(), len(files))
+            with Pool(processes=max_workers,
+                      initializer=_init_worker,
+                      initargs=(args, PREFIXES)) as pool:
+                results = pool.map(convert, files, chunksize=1)
+
+        report(results, time() - start)
 
 if __name__ == '__main__':
     main()
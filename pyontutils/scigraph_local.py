@@ -0,0 +1,165 @@
+""" Answer SciGraph Graph.getNeighbors queries from an in memory rdflib graph.
+
+    LocalGraph can be passed anywhere a scigraph Graph is used to build
+    trees, e.g. hierarchies.creatTree(..., graph=LocalGraph(graph)), and
+    returns the same json shape without a round trip to a SciGraph server.
+    ontload.import_tree uses it to walk the import chains of local files.
+"""
+
+from collections import defaultdict
+import rdflib
+from pyontutils.utils import QnameResolver
+from pyontutils.closed_namespaces import rdf, rdfs, owl
+
+# relationship names that SciGraph uses in place of curies
+_names = {rdfs.subClassOf: 'subClassOf',
+          rdfs.subPropertyOf: 'subPropertyOf',
+          rdfs.isDefinedBy: 'isDefinedBy',
+          owl.equivalentClass: 'equivalentClass',
+          rdf.type: 'type'}
+_predicates = {v:k for k, v in _names.items()}
+_directions = {'OUTGOING': ('_out',),
+               'INCOMING': ('_in',),
+               'BOTH': ('_out', '_in')}
+
+
+class LocalGraph:
+    """ Adjacency and label indexes are built once so that each
+        query is linear in the size of the neighborhood it returns.
+
+        Existential and universal restrictions on subClassOf are
+        materialized as direct edges the way SciGraph loads them. """
+
+    def __init__(self, graph, label_predicate=rdfs.label, basePath=None):
+        self.g = graph
+        self._basePath = basePath if basePath is not None else 'file://'
+        self._last_url = self._basePath
+        self._qnames = QnameResolver.from_graph(graph)
+        self._namespaces = self._qnames.namespaces
+        self.labels = {}
+        self.deprecated = set()
+        self._out = defaultdict(lambda: defaultdict(list))
+        self._in = defaultdict(lambda: defaultdict(list))
+        self._subproperties = defaultdict(set)
+        self._index(label_predicate)
+
+    def _index(self, label_predicate):
+        restrictions = {}
+        for s, p, o in self.g:
+            if p == label_predicate:
+                if s not in self.labels:
+                    self.labels[s] = str(o)
+            elif p == owl.deprecated:
+                if o.toPython() is True:
+                    self.deprecated.add(s)
+            elif p == rdfs.subPropertyOf:
+                self._subproperties[o].add(s)
+
+            if isinstance(o, rdflib.Literal):
+                continue
+            elif p == owl.onProperty:
+                restrictions.setdefault(s, [None, None])[0] = o
+            elif p == owl.someValuesFrom or p == owl.allValuesFrom:
+                restrictions.setdefault(s, [None, None])[1] = o
+
+            self._add(s, p, o)
+
+        for s, r in self.g.subject_objects(rdfs.subClassOf):
+            if r in restrictions:
+                p, o = restrictions[r]
+                if p is not None and isinstance(o, rdflib.URIRef):
+                    self._add(s, p, o)
+
+    def _add(self, s, p, o):
+        self._out[s][p].append(o)
+        self._in[o][p].append(s)
+
+    def expand(self, id):
+        """ curie or iri to a URIRef, None if the prefix is unknown """
+        if isinstance(id, rdflib.URIRef) or id.startswith('http') or id.startswith('file:'):
+            return rdflib.URIRef(id)
+        prefix, suffix = id.split(':', 1) if ':' in id else ('', id)
+        if prefix in self._namespaces:
+            return rdflib.URIRef(self._namespaces[prefix] + suffix)
+
+    def qname(self, node):
+        if isinstance(node, rdflib.BNode):
+            return '_:' + node
+
+        return self._qnames.qname(node, str(node))
+
+    def _relationship(self, relationshipType, entail):
+        if relationshipType is None:
+            return None
+        elif relationshipType in _predicates:
+            predicate = _predicates[relationshipType]
+        else:
+            predicate = self.expand(relationshipType)
+
+        predicates = {predicate}
+        if entail:
+            todo = [predicate]
+            while todo:
+                for sub in self._subproperties[todo.pop()]:
+                    if sub not in predicates:
+                        predicates.add(sub)
+                        todo.append(sub)
+
+        return predicates
+
+    def _node(self, node):
+        meta = {owl.deprecated.toPython(): True} if node in self.deprecated else {}
+        return {'id': self.qname(node), 'lbl': self.labels.get(node), 'meta': meta}
+
+    def getNeighbors(self, id, depth=None, blankNodes=None, relationshipType=None,
+                     direction=None, entail=None, project=None, callback=None,
+                     output='application/json'):
+        """ Same arguments and json as scigraph Graph.getNeighbors,
+            returns None if id is not in the graph like a 404 would """
+        start = self.expand(id)
+        if start is None or (start not in self._out and start not in self._in
+                             and start not in self.labels):
+            return None
+
+        depth = 1 if depth is None else int(depth)
+        direction = direction or 'BOTH'
+        if direction not in _directions:
+            raise ValueError(f'unknown direction {direction!r} '
+                             f'should be one of {sorted(_directions)}')
+
+        predicates = self._relationship(relationshipType, True if entail is None else entail)
+        indexes = tuple(getattr(self, index) for index in _directions[direction])
+
+        seen = {start}
+        nodes = [start]
+        edges = []
+        edge_seen = set()
+        frontier = [start]
+        for _ in range(depth):
+            next_ = []
+            for node in frontier:
+                for index in indexes:
+                    outgoing = index is self._out
+                    adjacent = index[node] if node in index else {}
+                    for p in adjacent:
+                        if predicates is not None and p not in predicates:
+                            continue
+                        for other in adjacent[p]:
+                            if not blankNodes and isinstance(other, rdflib.BNode):
+                                continue
+                            edge = (node, p, other) if outgoing else (other, p, node)
+                            if edge not in edge_seen:
+                                edge_seen.add(edge)
+                                edges.append(edge)
+                            if other not in seen:
+                                seen.add(other)
+                                nodes.append(other)
+                                next_.append(other)
+            frontier = next_
+
+        return {'nodes': [self._node(n) for n in nodes],
+                'edges': [{'sub': self.qname(s),
+                           'pred': _names[p] if p in _names else self.qname(p),
+                           'obj': self.qname(o),
+                           'meta': {}}
+                          for s, p, o in edges]}
@@ -17,6 +17,7 @@ from functools import wraps
 from collections import namedtuple, MutableMapping
 from concurrent.futures import ThreadPoolExecutor
 from colorlog import ColoredFormatter
+from ttlser.utils import PrefixTrie, QnameResolver
 
 
 def get_working_dir(script__file__):
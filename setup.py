@@ -37,6 +37,7 @@ setup(
     python_requires='>=3.6',
     tests_require=tests_require,
     install_requires=[
+        'aiohttp',
         'appdirs',
         'colorlog',
         'docopt',
@@ -53,7 +54,7 @@ setup(
         'pyyaml',
         'requests',
         'terminaltables',
-        'ttlser',
+        'ttlser>=1.1.0',
         'werkzeug',  # for IterIO which can probably just be copied one off
     ],
     extras_require={'dev': ['pytest-cov', 'wheel'],
@@ -64,6 +65,7 @@ setup(
     #data_files=[('resources',['pyontutils/resources/chebi-subset-ids.txt',])],  # not part of distro
     entry_points={
         'console_scripts': [
+            'benchmark=pyontutils.benchmark:main',
             'graphml-to-ttl=pyontutils.graphml_to_ttl:main',
             'necromancy=pyontutils.necromancy:main',
             'ont-catalog=pyontutils.make_catalog:main',
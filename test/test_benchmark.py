@@ -0,0 +1,27 @@
+import unittest
+from pyontutils import benchmark as bench
+
+
+class TestBenchmark(unittest.TestCase):
+    params = dict(triples=500, depth=2, list_length=3, terms=50, tree_depth=4, neurons=5, scale=2)
+
+    def test_synthetic_graph(self):
+        graph = bench.synthetic_graph(500, 3, 4)
+        assert len(graph) >= 500
+        assert len(set(graph.subjects())) > len(set(graph.subjects(bench.rdf.type,
+                                                                    bench.owl.Class)))
+
+    def test_run_compare(self):
+        names = 'ttlser', 'obo', 'cull', 'tree', 'qnames'
+        current = bench.run(names, reps=1, **self.params)
+        assert list(current['results']) == list(names)
+        for result in current['results'].values():
+            assert result['ops'] and result['ops_per_sec'] > 0 and result['peak_memory'] > 0
+
+        lines, regressions = bench.compare(current, current)
+        assert len(lines) == len(names) and not regressions
+
+        slower = {'results': {name: {**result, 'seconds': result['seconds'] / 2}
+                              for name, result in current['results'].items()}}
+        _, regressions = bench.compare(current, slower)
+        assert regressions == list(names)
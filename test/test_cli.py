@@ -5,6 +5,7 @@ from pyontutils.integration_test_helper import _TestCliBase, Folders
 
 class TestCli(Folders, _TestCliBase):
     commands = (
+        ['benchmark', '--help'],
         ['graphml-to-ttl', '--help'],
         ['necromancy', '--help'],
         ['ontload', '--help'],
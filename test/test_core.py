@@ -1,6 +1,15 @@
 import unittest
-from pyontutils.core import ilxtr
-from pyontutils.combinators import annotation
+import rdflib
+from rdflib.compare import isomorphic
+from rdflib.plugins.memory import IOMemory, Memory
+import subprocess
+from pathlib import Path
+from pyontutils.core import ilxtr, GitProvenance, Ont, build, build_order, makeGraph
+from pyontutils.core import makePrefixes, cull_prefixes_inplace
+from pyontutils.combinators import annotation, restriction, oc_, olit, Template, Templates
+from pyontutils.combinators import Restriction2, EquivalentClass, POCombinator, intersectionOf
+from pyontutils.combinators import restrictions, oec, Combinator
+from pyontutils.closed_namespaces import rdf, rdfs, owl
 
 annotation_ev = """ Axioms
 
@@ -34,4 +43,146 @@ class TestCore(unittest.TestCase):
         except TypeError:
             pass
 
+    def test_template(self):
+        def expr(s, p, o, label):
+            yield from oc_(s, restriction(p, o))
+            yield from olit(s, rdfs.label, label)
 
+        template = Template(expr, 4)
+        rows = [(ilxtr[f'c{i}'], ilxtr.p, ilxtr[f'o{i}'], f'label {i}') for i in range(3)]
+        expect = rdflib.Graph()
+        [expect.add(t) for row in rows for t in expr(*row)]
+        graph = rdflib.Graph()
+        n = template.addN(graph, rows)
+        assert n == len(template) * len(rows) == len(expect)
+        assert isomorphic(graph, expect)
+        assert len(set(graph.subjects(rdfs.label, None))) == len(rows)
+
+        def typed(s, value):
+            yield s, rdfs.comment, rdflib.Literal(value, datatype=rdflib.XSD.string)
+
+        def lang(s, value):
+            yield s, rdfs.comment, rdflib.Literal(value, lang='en')
+
+        def formatted(s, value):
+            yield s, rdfs.comment, rdflib.Literal(f'value is {value}')
+
+        for expr in (typed, lang, formatted):
+            try:
+                Template(expr, 2)
+                raise AssertionError(f'{expr.__name__} should have failed')
+            except ValueError:
+                pass
+
+    def test_templates(self):
+        restN = Restriction2(None, owl.onProperty, owl.someValuesFrom)
+        restMax = Restriction2(rdfs.subClassOf, owl.onProperty, owl.someValuesFrom, owl.maxCardinality)
+        oECN = EquivalentClass(None)
+
+        @Templates
+        def expr(s, label, *members, rests=tuple(), synonyms=tuple(), equivalentClass=oec):
+            yield from oc_(s)
+            yield from equivalentClass.serialize(s, *members, *restrictions(*rests))
+            yield from olit(s, rdfs.label, label)
+            if synonyms:
+                yield from olit(s, rdfs.comment, *synonyms)
+
+        class Opaque(Combinator):
+            def __init__(self):
+                pass
+            def __call__(self, subject, predicate=None):
+                yield subject, rdf.type, owl.Class
+
+        calls = []
+        for i in range(3):
+            c, o, p = ilxtr[f'c{i}'], ilxtr[f'o{i}'], ilxtr[f'p{i}']
+            calls += [((c, f'label {i}', intersectionOf(o, restN(p, o))),
+                       dict(rests=((p, intersectionOf(o, restN(p, c))),), synonyms=(f'syn {i}',))),
+                      ((c, f'label {i}', restMax(p, o, rdflib.Literal(i + 1))),
+                       dict(equivalentClass=oECN)),
+                      ((c, f'label {i}', POCombinator(rdfs.subClassOf, restN(p, o))),
+                       dict(equivalentClass=oECN, synonyms=('', f'syn {i}'))),
+                      ((c, '', Opaque()), dict())]
+
+        for args, kwargs in calls:
+            graph, expect = rdflib.Graph(), rdflib.Graph()
+            [graph.add(t) for t in expr(*args, **kwargs)]
+            [expect.add(t) for t in expr.function(*args, **kwargs)]
+            assert isomorphic(graph, expect), args
+
+        assert len(expr._templates) == 3, 'one template per shape, none for Opaque'
+        assert None not in expr._templates.values()
+
+    def test_git_provenance(self):
+        path = Path(__file__)
+        expect = subprocess.check_output(['git', 'log', '-n', '1', '--pretty=format:%H', '--',
+                                          path.name], cwd=path.parent).decode()
+        gp = GitProvenance()
+        gp.prefetch(path, path.parent / 'does-not-exist')
+        assert gp.last_commit(path) == expect
+        assert gp.last_commit(path.parent / 'does-not-exist') == ''
+        assert gp.head(path) == gp.head(path.parent)
+
+    def test_build_order(self):
+        class A(Ont): pass
+        class B(Ont): imports = (i for i in (A,))
+        class C(Ont): imports = B, A
+
+        order, depends = build_order((C, B, A))
+        assert order == [A, B, C]
+        assert depends[C] == (B, A)
+        assert B.imports == (A,), 'generator imports should be materialized'
+
+        class D(Ont): pass
+        class E(Ont): imports = D,
+        D.imports = E,
+        try:
+            build_order((D, E))
+            raise AssertionError('should have failed')
+        except ValueError:
+            pass
+
+    def test_build_parallel(self):
+        class F(Ont):
+            filename = 'test-build-f'
+            prefixes = makePrefixes('ilxtr', 'owl')
+            def _triples(self):
+                self.lookup = {ilxtr.f: 'f'}
+                yield ilxtr.f, rdflib.RDF.type, owl.Class
+
+        class G(F):
+            filename = 'test-build-g'
+            imports = F,
+            def _triples(self):
+                yield ilxtr.g, rdflib.RDF.type, owl.Class
+
+        f, g = build(F, G, n_jobs=2, write=False)
+        assert f.lookup == {ilxtr.f: 'f'}
+        assert (ilxtr.f, rdflib.RDF.type, owl.Class) in f.graph
+        assert (ilxtr.g, rdflib.RDF.type, owl.Class) in g.graph
+
+    def test_cull_prefixes_inplace(self):
+        prefixes = {'ilxtr': str(ilxtr), 'unused': 'http://example.org/unused/'}
+        for store in (IOMemory(), Memory()):
+            graph = rdflib.Graph(store=store)
+            [graph.bind(p, n) for p, n in prefixes.items()]
+            graph.add((ilxtr.a, rdfs.label, rdflib.Literal('a')))
+            mg = cull_prefixes_inplace(graph, prefixes=prefixes)
+            assert (mg.g is graph) == isinstance(store, IOMemory)
+            namespaces = dict(mg.g.namespaces())
+            assert 'ilxtr' in namespaces and 'unused' not in namespaces
+            assert set(mg.g) == set(graph)
+
+    def test_replace_urirefs(self):
+        graph = rdflib.Graph()
+        for t in ((ilxtr.a, ilxtr.p, ilxtr.b),
+                  (ilxtr.b, ilxtr.p, ilxtr.c),
+                  (ilxtr.a, rdfs.label, rdflib.Literal('a'))):
+            graph.add(t)
+
+        mg = makeGraph('', graph=graph, prefixes={'ilxtr': str(ilxtr)})
+        counts = mg.replace_urirefs({'ilxtr:a': 'ilxtr:b', ilxtr.b: ilxtr.c, ilxtr.p: ilxtr.q})
+        assert set(graph) == {(ilxtr.b, ilxtr.q, ilxtr.c),
+                              (ilxtr.c, ilxtr.q, ilxtr.c),
+                              (ilxtr.b, rdfs.label, rdflib.Literal('a'))}
+        assert counts == {ilxtr.a: 2, ilxtr.b: 2, ilxtr.p: 2}
@@ -0,0 +1,106 @@
+import json
+import unittest
+import tempfile
+import threading
+from time import sleep, perf_counter
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from pyontutils.loadtest import LoadTester, Histogram
+
+
+class Endpoints(BaseHTTPRequestHandler):
+    """ /ok, /slow, /fail returns 500, /nohead rejects HEAD and /missing is a 404 """
+
+    hits = Counter()
+    lock = threading.Lock()
+
+    def respond(self, body):
+        with self.lock:
+            self.hits[self.command, self.path] += 1
+
+        if self.path == '/slow':
+            sleep(.3)
+            status = 200
+        elif self.path == '/fail':
+            status = 500
+        elif self.path == '/nohead':
+            status = 405 if self.command == 'HEAD' else 200
+        elif self.path == '/missing':
+            status = 404
+        else:
+            status = 200
+
+        self.send_response(status)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        if body:
+            self.wfile.write(b'ok')
+
+    def do_HEAD(self):
+        self.respond(False)
+
+    def do_GET(self):
+        self.respond(True)
+
+    def log_message(self, *args):
+        pass
+
+
+class Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class TestLoadTester(unittest.TestCase):
+
+    def setUp(self):
+        Endpoints.hits.clear()
+        self.server = Server(('127.0.0.1', 0), Endpoints)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base = 'http://127.0.0.1:{}'.format(self.server.server_port)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_statuses(self):
+        paths = '/ok', '/slow', '/fail', '/nohead', '/missing', '/ok'
+        tester = LoadTester(timeout=5)
+        results = tester.run([self.base + p for p in paths])
+        assert [r.ok for r in results] == [True, True, False, True, False, True]
+        assert Endpoints.hits['HEAD', '/ok'] == 1, 'duplicate urls should be cached'
+        assert Endpoints.hits['GET', '/nohead'] == 1 and results[3].method == 'GET'
+
+        tester.run([self.base + '/ok'])
+        assert Endpoints.hits['HEAD', '/ok'] == 1 and tester.cache_hits == 2
+
+        with tempfile.NamedTemporaryFile('rt', suffix='.json') as f:
+            tester.write(f.name)
+            report = json.load(f)
+
+        assert report['urls'] == 5
+        assert report['failed'] == sorted([self.base + '/fail', self.base + '/missing'])
+        assert report['statuses']['405'] == 1 and report['statuses']['500'] == 2
+        assert report['methods']['GET'] == {'200': 1, '404': 1, '500': 1}
+        latency = report['latency']
+        assert latency['p50'] <= latency['p90'] <= latency['p99'] <= latency['max']
+        assert latency['max'] >= .3
+
+    def test_timeout(self):
+        result, = LoadTester(timeout=.1).run([self.base + '/slow'])
+        assert result.error == 'timeout' and not result.ok
+        assert Endpoints.hits['GET', '/slow'] == 0, 'timeouts are not retried'
+
+    def test_rate(self):
+        urls = [self.base + '/ok?{}'.format(i) for i in range(10)]
+        start = perf_counter()
+        LoadTester(rate=50).run(urls)
+        assert perf_counter() - start >= 9 / 50
+
+    def test_histogram(self):
+        h = Histogram()
+        for seconds in (.0005, .003, .003, .1):
+            h.record(seconds)
+
+        assert h.buckets() == [[1, 1], [4, 2], [128, 1]]
+        assert h.stats()['p50'] == .003
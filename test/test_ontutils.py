@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+import rdflib
+from pathlib import Path
+from pyontutils.ontutils import get_spells, spell_file, tokstrip
+from pyontutils.ontutils import HeaderIndex, get_epoch, version_iris
+
+ttl = '''@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+@prefix skos: <http://www.w3.org/2004/02/skos/core#> .
+@prefix ex: <http://example.org/> .
+ex:a rdfs:comment "A speling misteak (here)."@en ;
+    skos:definition """multi
+line defintion""" ;
+    rdfs:label "speling in a label is not checked" .
+ex:b <http://purl.obolibrary.org/obo/IAO_0000115> "Definition, fine." .
+'''
+
+
+class TestSpell(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.ttl')
+        with os.fdopen(fd, 'wt') as f:
+            f.write(ttl)
+
+    def tearDown(self):
+        os.unlink(self.path)
+
+    def test_get_spells(self):
+        graph = rdflib.Graph().parse(self.path, format='turtle')
+        expect = set(t for t in graph if t[1] != rdflib.RDFS.label)
+        assert set((s, p, o) for _, s, p, o in get_spells(self.path)) == expect
+
+    def test_spell_file(self):
+        bad = {'speling', 'misteak', 'defintion'}
+        misses, tokens = spell_file(self.path, check=lambda tok: tok not in bad)
+        assert tokens == bad
+        assert len(misses) == 2
+
+    def test_tokstrip(self):
+        assert tokstrip('"word.') == ('"', 'word', '.')
+        assert tokstrip('(a-b)\\n') == ('(', 'a-b', ')\\n')
+        assert tokstrip('...') == ('...', '', '')
+
+
+header = '''@prefix owl: <http://www.w3.org/2002/07/owl#> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+
+<http://example.org/{name}.ttl> a owl:Ontology ;
+    owl:versionIRI <http://example.org/{name}/version/{epoch}/{name}.ttl> .
+
+### Classes
+
+<http://example.org/{name}#1> a owl:Class ;
+    rdfs:label "one" .
+'''
+
+
+class TestHeaderIndex(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.dir.name)
+        self.files = []
+        for name, epoch in (('a', 100), ('b', 200)):
+            path = self.path / (name + '.ttl')
+            path.write_text(header.format(name=name, epoch=epoch))
+            self.files.append(path.as_posix())
+
+        self.index = HeaderIndex(cache=self.path / 'headers.json', n_jobs=1)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_epoch(self):
+        assert get_epoch(*self.files, index=self.index) == 100
+        assert get_epoch(*self.files, min_=False, index=self.index) == 200
+        assert HeaderIndex(cache=self.index.cache).index == self.index.index
+
+    def test_version_iris(self):
+        version_iris(*self.files, epoch=300, index=self.index)
+        assert get_epoch(*self.files, index=HeaderIndex(cache=self.index.cache, n_jobs=1)) == 300
+        text = Path(self.files[0]).read_text()
+        assert 'version/300/a.ttl' in text and 'rdfs:label "one"' in text
+
@@ -0,0 +1,73 @@
+import unittest
+import rdflib
+from pyontutils.core import makeGraph
+from pyontutils.closed_namespaces import rdf, rdfs, owl
+from pyontutils.hierarchies import creatTree
+from pyontutils.scigraph_local import LocalGraph
+
+ex = rdflib.Namespace('http://example.org/')
+
+
+class TestLocalGraph(unittest.TestCase):
+    def setUp(self):
+        graph = rdflib.Graph()
+        graph.bind('ex', ex)
+        graph.bind('rdfs', rdfs)
+        graph.bind('owl', owl)
+        for child, parent in (('b', 'a'), ('c', 'a'), ('d', 'b'), ('e', 'd')):
+            graph.add((ex[child], rdfs.subClassOf, ex[parent]))
+        for node in 'abcde':
+            graph.add((ex[node], rdf.type, owl.Class))
+            graph.add((ex[node], rdfs.label, rdflib.Literal('label ' + node)))
+
+        restriction = rdflib.BNode()
+        graph.add((ex.c, rdfs.subClassOf, restriction))
+        graph.add((restriction, rdf.type, owl.Restriction))
+        graph.add((restriction, owl.onProperty, ex.partOf))
+        graph.add((restriction, owl.someValuesFrom, ex.a))
+        graph.add((ex.hasPart, rdfs.subPropertyOf, ex.partOf))
+        graph.add((ex.e, ex.hasPart, ex.a))
+        graph.add((ex.d, owl.deprecated, rdflib.Literal(True)))
+        self.graph = graph
+        self.lg = LocalGraph(graph)
+
+    def test_depth(self):
+        j = self.lg.getNeighbors('ex:a', relationshipType='subClassOf',
+                                 direction='INCOMING', depth=2)
+        nodes = {n['id']:n for n in j['nodes']}
+        assert j['nodes'][0]['id'] == 'ex:a'
+        assert set(nodes) == {'ex:a', 'ex:b', 'ex:c', 'ex:d'}
+        assert {(e['sub'], e['pred'], e['obj']) for e in j['edges']} == {
+            ('ex:b', 'subClassOf', 'ex:a'),
+            ('ex:c', 'subClassOf', 'ex:a'),
+            ('ex:d', 'subClassOf', 'ex:b')}
+        assert nodes['ex:a']['lbl'] == 'label a'
+        assert nodes['ex:d']['meta'] == {str(owl.deprecated): True}
+
+    def test_restriction_entail(self):
+        j = self.lg.getNeighbors(str(ex.a), relationshipType='ex:partOf', direction='INCOMING')
+        assert {e['sub'] for e in j['edges']} == {'ex:c', 'ex:e'}
+        j = self.lg.getNeighbors('ex:a', relationshipType='ex:partOf',
+                                 direction='INCOMING', entail=False)
+        assert {e['sub'] for e in j['edges']} == {'ex:c'}
+
+    def test_direction(self):
+        j = self.lg.getNeighbors('ex:b', direction='OUTGOING')
+        assert {(e['sub'], e['obj']) for e in j['edges']} == {('ex:b', 'ex:a'),
+                                                             ('ex:b', 'owl:Class')}
+        try:
+            self.lg.getNeighbors('ex:b', direction='SIDEWAYS')
+            raise AssertionError('should have failed')
+        except ValueError:
+            pass
+
+    def test_missing(self):
+        assert self.lg.getNeighbors('ex:nothing') is None
+
+    def test_tree(self):
+        args = 'ex:a', 'rdfs:subClassOf', 'INCOMING', 10
+        prefixes = {'ex': str(ex)}
+        local, _ = creatTree(*args, graph=self.lg, prefixes=prefixes)
+        json = makeGraph('', graph=self.graph).make_scigraph_json('rdfs:subClassOf', direct=True)
+        expect, _ = creatTree(*args, json=json, prefixes=prefixes)
+        assert str(local) == str(expect)
@@ -1,5 +1,44 @@
 import unittest
-from pyontutils.utils import injective_dict, Async, deferred
+import rdflib
+from pyontutils.utils import injective_dict, Async, deferred, PrefixTrie, QnameResolver
+
+
+class TestPrefixTrie(unittest.TestCase):
+    def test_longest(self):
+        trie = PrefixTrie({'a':'http://a.org/', 'ab':'http://a.org/b/', 'c':'http://c.org/c_'})
+        assert trie.longest('http://a.org/b/1') == ('ab', 'http://a.org/b/')
+        assert trie.longest('http://a.org/1') == ('a', 'http://a.org/')
+        assert trie.longest('http://b.org/1') is None
+        assert trie.curie_prefix('http://c.org/c_1') == 'c'
+        assert trie.curie_prefix('http://a.org/d/1') is None
+
+
+class TestQnameResolver(unittest.TestCase):
+    def test_matches_compute_qname(self):
+        graph = rdflib.Graph()
+        for prefix, namespace in (('obo', 'http://purl.obolibrary.org/obo/'),
+                                  ('UBERON', 'http://purl.obolibrary.org/obo/UBERON_'),
+                                  ('a', 'http://a.org/'),
+                                  ('', 'http://a.org/b/')):
+            graph.bind(prefix, namespace)
+
+        resolver = QnameResolver.from_graph(graph)
+        uris = [rdflib.URIRef(namespace + suffix)
+                for _, namespace in graph.namespaces()
+                for suffix in ('', '0000955', 'x_y', 'c/d', 'e#f', '-1')]
+        for uri in uris:
+            try:
+                prefix, _, name = graph.namespace_manager.compute_qname(uri, generate=False)
+                expect = prefix + ':' + name
+            except (KeyError, ValueError):
+                expect = None
+
+            assert resolver.qname(uri) == expect, uri
+
+        assert resolver.qname_all(uris) == [resolver.qname(u) for u in uris]
+        assert resolver.expand_all(['UBERON:1', 'obo:GO_1']) == [
+            rdflib.URIRef('http://purl.obolibrary.org/obo/UBERON_1'),
+            rdflib.URIRef('http://purl.obolibrary.org/obo/GO_1')]
 
 
 class TestInjectiveDict(unittest.TestCase):
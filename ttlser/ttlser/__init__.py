@@ -1,4 +1,4 @@
 from .serializers import *
 from .serializers import __all__
 
-__version__ = '1.0.0'
+__version__ = '1.1.0'
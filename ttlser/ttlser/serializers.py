@@ -2,12 +2,14 @@
 import re
 import sys
 from decimal import Decimal
+from operator import itemgetter
+from itertools import groupby
 from datetime import datetime
 from rdflib import RDF, RDFS, OWL, XSD, BNode, URIRef, Literal
 from rdflib.graph import QuotedGraph
 from rdflib.namespace import SKOS, DC, Namespace
 from rdflib.plugins.serializers.turtle import TurtleSerializer
-from ttlser.utils import subclasses
+from ttlser.utils import subclasses, QnameResolver
 
 # XXX WARNING prefixes are not 100% deterministic if there is more than one prefix for namespace
 #     the implementation of IOMemory.bind in rdflib means that the last prefix defined in the list
@@ -96,11 +98,17 @@ class ListRanker:
             self.serializer.nosort.add(self.node)
         self.vals = []
         self.nodes = []  # list helper nodes
+        self.cells = []  # every node on the rdf:rest chain including rdf:nil
+        store = self.serializer.store
+        self.valid = store.value(node, RDF.first) is not None
         l = self.node
         while l:
-            item = self.serializer.store.value(l, RDF.first)
+            self.cells.append(l)
+            if self.valid and l != RDF.nil:
+                self.valid = self.valid_cell(store, l)
+            item = store.value(l, RDF.first)
             self.add(item, l)
-            l = self.serializer.store.value(l, RDF.rest)
+            l = store.value(l, RDF.rest)
         self.vis_vals = [v for v in self.vals if not isinstance(v, BNode)]
         self.bvals = [v for v in self.vals if isinstance(v, BNode)]
 
@@ -113,6 +121,12 @@ class ListRanker:
         except StopIteration:
             return True
 
+    @staticmethod
+    def valid_cell(store, l):
+        """ a list cell has only rdf:first and rdf:rest and optionally a rdf:List type """
+        po = list(store.predicate_objects(l))
+        return len(po) == 2 or len(po) == 3 and (RDF.type, RDF.List) in po
+
     def add(self, item, node):
         if item is not None:
             self.vals.append(item)
@@ -155,6 +169,7 @@ class CustomTurtleSerializer(TurtleSerializer):
     _newline = True
     _nl = '\n'
     _space = ' '
+    _flush_size = 2 ** 16  # characters buffered before encoding and writing to the stream
     sortkey = staticmethod(natsort)
     make_litsortkey = staticmethod(make_litsort)
     no_reorder_list = OWL.propertyChainAxiom,
@@ -239,9 +254,16 @@ class CustomTurtleSerializer(TurtleSerializer):
         setattr(store.__class__, 'qname', qname_mp)  # monkey patch to fix generate=True
         if reset:
             store.namespace_manager.reset()  # ensure that the namespace_manager cache doesn't lead to non deterministic ser
+        self._qnames = QnameResolver.from_graph(store)
 
         self.SECTIONS = ['###' + self._space + s + self._nl if s else s for s in self.SECTIONS]
         self.indentString = self._space * len(self.indentString)
+        self._indents = [self.indentString * depth for depth in range(16)]
+        self._pred_sep = (self._space + ';' + self._nl) if self._newline else ';'
+        self._obj_sep = ',' + self._nl
+        self._end = self._space + '.'
+        self._buffer = []
+        self._buffered = 0
 
         sym_cases = []
         for p in self.symmetric_predicates:
@@ -273,8 +295,12 @@ class CustomTurtleSerializer(TurtleSerializer):
         self.nosort = set()
         self.list_rankers = self._ListRank()
         self.max_lr = len(self.list_rankers)
+        # keep list structure so that printing does not walk lists again
+        self._lists = {n:(tuple(lr.cells), tuple(lr.vals), lr.valid, lr.reorder)
+                       for n, lr in self.list_rankers.items()}
         self._list_helpers = {n:p for p, lr in self.list_rankers.items() for n in lr.nodes}
         self.node_rank = self._BNodeRank()
+        self._ranks = {**self.object_rank, **self.node_rank}
         for s, p, o in sym_cases:
             if self._globalSortKey(s) > self._globalSortKey(o):  # TODO verify that this does what we expect
                 store.remove((s, p, o))
@@ -301,7 +327,7 @@ class CustomTurtleSerializer(TurtleSerializer):
                          for s, o in self.store.subject_objects(RDF.type))
 
             sys.stderr.write('\n')
-            [sys.stderr.write('{:<30} {}\n'.format(self.store.qname(p), i))
+            [sys.stderr.write('{:<30} {}\n'.format(self.qname(p), i))
              for i, p in enumerate(self.predicateOrder)]
         if DEBUG: debug()
 
@@ -430,10 +456,20 @@ class CustomTurtleSerializer(TurtleSerializer):
         if DEBUG: debug()
         return out
 
+    def qname(self, uri):
+        """ same as the store.qname monkey patch but from a resolver
+            built for the namespaces bound when ranking starts """
+        parts = self._qnames.qname_parts(uri)
+        if parts is None:
+            return uri
+
+        prefix, _, name = parts
+        return prefix + ':' + name if prefix else name
+
     def _PredRank(self):
         pr = sorted(sorted(set(self.store.predicates(None, None)),
-                           key=self.store.qname),
-                    key=lambda p: self.sortkey(self.store.qname(p)))
+                           key=self.qname),
+                    key=lambda p: self.sortkey(self.qname(p)))
         a = [p for p in self.predicateOrder if p in pr]  # remove predicateOrder not in pr
         b = [p for p in pr if p not in self.predicateOrder]  # dedupe pr before merging
         self.predicateOrder = a + b  # predicateOrder first, then any remaining
@@ -454,8 +490,8 @@ class CustomTurtleSerializer(TurtleSerializer):
                     sorted(
                         sorted(set(_ for t in self.store for _ in t
                                    if isinstance(_, URIRef)),
-                               key=self.store.qname),
-                        key=lambda _: self.sortkey(self.store.qname(_))))}
+                               key=self.qname),
+                        key=lambda _: self.sortkey(self.qname(_))))}
 
     def _ListRank(self):
         list_rankers = {}
@@ -544,21 +580,46 @@ class CustomTurtleSerializer(TurtleSerializer):
         return sections
 
     def predicateList(self, subject, newline=False):  # modified to sort object lists
-        properties = self.buildPredicateHash(subject)
-        propList = self.sortProperties(properties)
+        propList = self._predicateObjects(subject)
         if len(propList) == 0:
             return
-        self.verb(propList[0], newline=newline)
-        self.objectList(sorted(sorted(properties[propList[0]])[::-1], key=self._globalSortKey))  # rdf:type
-        whitespace = ('{};{}'.format(self._space, self._nl) + self.indent(1)
-                      if self._newline else ';')
-        for predicate in propList[1:]:
+        (predicate, objects), *rest = propList
+        self.verb(predicate, newline=newline)
+        self.objectList(objects)  # rdf:type
+        whitespace = (self._pred_sep + self.indent(1)
+                      if self._newline else self._pred_sep)
+        for predicate, objects in rest:
             self.write(whitespace)
             self.verb(predicate, newline=self._newline)
-            self.objectList(sorted(sorted(properties[predicate])[::-1], key=self._globalSortKey))
+            self.objectList(objects)
 
         return True
 
+    def _predicateObjects(self, subject):
+        """ predicates of subject in rank order each paired
+            with a tuple of its objects in global rank order """
+        properties = self.buildPredicateHash(subject)
+        return [(p, self._sortObjects(properties[p]))
+                for p in sorted(properties, key=self.predicate_rank.__getitem__)]
+
+    def _sortObjects(self, objects):
+        """ a single sort on global rank, runs of equal rank (bnodes only)
+            are reversed to match sorted(sorted(objects)[::-1], key=rank) """
+        if len(objects) == 1:
+            return tuple(objects)
+
+        ranks = self._ranks
+        keyed = sorted(((ranks[o] if o in ranks else self._globalSortKey(o), o)
+                        for o in objects), key=itemgetter(0))
+        out = []
+        for _, group in groupby(keyed, key=itemgetter(0)):
+            group = [o for _, o in group]
+            if len(group) > 1:
+                group.sort(reverse=True)
+            out.extend(group)
+
+        return tuple(out)
+
     def sortProperties(self, properties):  # modified to sort objects using their global rank
         """Take a hash from predicate uris to lists of values.
            Sort the lists of values.  Return a sorted list of properties."""
@@ -622,30 +683,34 @@ class CustomTurtleSerializer(TurtleSerializer):
         """
         Checks if l is a valid RDF list, i.e. no nodes have other properties.
         """
+        if l in self._lists:
+            return self._lists[l][2]
         try:
             if self.store.value(l, RDF.first) is None:
                 return False
         except:
             return False
         while l:
-            if l != RDF.nil:
-                po = list(self.store.predicate_objects(l))
-                if (RDF.type, RDF.List) in po and len(po) == 3:
-                    pass
-                elif len(po) != 2:
-                    return False
+            if l != RDF.nil and not ListRanker.valid_cell(self.store, l):
+                return False
             l = self.store.value(l, RDF.rest)
         return True
 
     def doList(self, l):  # modified to put rdf list items on new lines and to sort by global rank
-        reorder = ListRanker.test_reorder(l, self)
-        to_sort = []
-        while l:
-            item = self.store.value(l, RDF.first)
-            if item is not None:
-                to_sort.append(item)
-            self.subjectDone(l)
-            l = self.store.value(l, RDF.rest)
+        if l in self._lists:
+            cells, to_sort, _, reorder = self._lists[l]
+        else:
+            reorder = ListRanker.test_reorder(l, self)
+            cells, to_sort = [], []
+            while l:
+                item = self.store.value(l, RDF.first)
+                if item is not None:
+                    to_sort.append(item)
+                cells.append(l)
+                l = self.store.value(l, RDF.rest)
+
+        for cell in cells:
+            self.subjectDone(cell)
 
         whitespace = self._nl + self.indent(1) if self._newline else ''
 
@@ -705,7 +770,7 @@ class CustomTurtleSerializer(TurtleSerializer):
         self.write(self._nl + self.indent())
         self.path(subject, SUBJECT)
         self.predicateList(subject)
-        self.write('{}.'.format(self._space))
+        self.write(self._end)
         return True
 
     def s_squared(self, subject):  # modified to enable whitespace switching
@@ -717,7 +782,7 @@ class CustomTurtleSerializer(TurtleSerializer):
             self.write('{}#{}'.format(self._nl, self._space) +
                        str(self._globalSortKey(subject)) + self._nl)  # FIXME REMOVE
         self.predicateList(subject)
-        self.write('{}.'.format(self._space))
+        self.write(self._end)
         return True
 
     def objectList(self, objects):  # modified to use self._nl
@@ -728,10 +793,34 @@ class CustomTurtleSerializer(TurtleSerializer):
         self.depth += depthmod
         self.path(objects[0], OBJECT)
         for obj in objects[1:]:
-            self.write(',{}'.format(self._nl) + self.indent(1))
+            self.write(self._obj_sep + self.indent(1))
             self.path(obj, OBJECT, newline=True)
         self.depth -= depthmod
 
+    def indent(self, modifier=0):  # modified to reuse precomputed indentation
+        depth = self.depth + modifier
+        if depth <= 0:
+            return ''
+
+        indents = self._indents
+        while depth >= len(indents):
+            indents.append(self.indentString * len(indents))
+
+        return indents[depth]
+
+    def write(self, text):  # modified to buffer output and encode in large chunks
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if self._buffered >= self._flush_size:
+            self.flush()
+
+    def flush(self):
+        """ encode and write any buffered output to the stream """
+        if self._buffer:
+            self.stream.write(''.join(self._buffer).encode(self.encoding, 'replace'))
+            self._buffer.clear()
+            self._buffered = 0
+
     def getQName(self, uri, gen_prefix=True): # modified to make it possible to block gen_prefix
         return super(CustomTurtleSerializer, self).getQName(uri, gen_prefix and self._gen_prefix)
 
@@ -748,6 +837,8 @@ class CustomTurtleSerializer(TurtleSerializer):
         self.reset()
         self.stream = stream
         self.base = base
+        self._buffer.clear()
+        self._buffered = 0
 
         if spacious is not None:
             self._spacious = spacious
@@ -773,9 +864,10 @@ class CustomTurtleSerializer(TurtleSerializer):
                     self.write(self._nl)
 
         self.endDocument()
-        stream.write(self._nl.encode('ascii'))
+        self.write(self._nl)
         n, v = self._name, self.__version
-        stream.write(u'### Serialized using the {} serializer {}{}'.format(n, v, self._nl).encode('ascii'))
+        self.write('### Serialized using the {} serializer {}{}'.format(n, v, self._nl))
+        self.flush()
 
 
 class HtmlTurtleSerializer(CustomTurtleSerializer):
@@ -826,7 +918,7 @@ class HtmlTurtleSerializer(CustomTurtleSerializer):
 
 class RacketTurtleSerializer(CustomTurtleSerializer):
     def startDocument(self):
-        self.stream.write('#lang rdf/turtle{}'.format(self._nl).encode())
+        self.write('#lang rdf/turtle{}'.format(self._nl))
         super().startDocument()
 
 
@@ -866,7 +958,7 @@ class CompactTurtleSerializer(CustomTurtleSerializer):
     def s_default(self, subject):  # modified from TurtleSerializer to remove newlines
         self.path(subject, SUBJECT)
         self.predicateList(subject)
-        self.write('{}.'.format(self._space))
+        self.write(self._end)
         return True
 
     def objectList(self, objects):  # modified from TurtleSerializer to remove newlines
@@ -962,7 +1054,7 @@ class SubClassOfTurtleSerializer(CustomTurtleSerializer):
                    (OWL.imports, False))
                   for k, v in supersOf(p, oic).items()}
         wrapsort.supers = supers
-        qname = self.store.qname
+        qname = self.qname
 
         def nq(n):
             if isinstance(n, BNode):
@@ -981,7 +1073,7 @@ class SubClassOfTurtleSerializer(CustomTurtleSerializer):
                                    if isinstance(_, Literal))),
                            key=self.litsortkey) +
                     sorted(
-                        sorted(uris, key=self.store.qname),
+                        sorted(uris, key=self.qname),
                         key=wrapsort))}
 
 
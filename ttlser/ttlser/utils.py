@@ -1,4 +1,7 @@
+from functools import lru_cache
 import rdflib
+from rdflib.term import _is_valid_uri
+from rdflib.namespace import split_uri
 
 rdflib.plugin.register('nifttl', rdflib.serializer.Serializer,
                        'ttlser', 'CustomTurtleSerializer')
@@ -26,3 +29,124 @@ def subclasses(start):
     for sc in start.__subclasses__():
         yield sc
         yield from subclasses(sc)
+
+
+class PrefixTrie:
+    """ Character trie over namespace strings for longest prefix matching.
+        Built once from a {prefix: namespace} mapping, if more than one
+        prefix maps to the same namespace the last one wins. """
+
+    _leaf = object()
+
+    def __init__(self, prefixes):
+        self._root = {}
+        for prefix, namespace in prefixes.items():
+            node = self._root
+            for char in str(namespace):
+                node = node.setdefault(char, {})
+
+            node[self._leaf] = prefix, str(namespace)
+
+    def longest(self, string):
+        """ (prefix, namespace) for the longest namespace that string starts with """
+        match = None
+        node = self._root
+        if self._leaf in node:
+            match = node[self._leaf]
+
+        for char in string:
+            try:
+                node = node[char]
+            except KeyError:
+                break
+
+            if self._leaf in node:
+                match = node[self._leaf]
+
+        return match
+
+    def curie_prefix(self, uri):
+        """ prefix for uri if the remainder after the longest matching
+            namespace contains no further / or # separators """
+        match = self.longest(uri)
+        if match is not None:
+            prefix, namespace = match
+            suffix = uri[len(namespace):]
+            if '/' not in suffix and '#' not in suffix:
+                return prefix
+
+
+class QnameResolver:
+    """ Qnames and curie expansion for a fixed {prefix: namespace} mapping.
+        Splits uris the same way as NamespaceManager.compute_qname with
+        generate=False but matches namespaces against a PrefixTrie and
+        keeps a bounded memo of recent uris. Instances are never mutated
+        after construction so they can be shared between threads, build
+        a new one when the prefixes change. """
+
+    def __init__(self, prefixes, maxsize=2 ** 16):
+        self.namespaces = {prefix: str(namespace) for prefix, namespace in prefixes.items()}
+        self._trie = PrefixTrie(prefixes)
+        self._lookup = lru_cache(maxsize)(self._compute_qname)
+
+    @classmethod
+    def from_graph(cls, graph, maxsize=2 ** 16):
+        """ use the prefix that graph.store.prefix gives for each namespace """
+        store = graph.store
+        # PrefixTrie keeps the last prefix seen for a namespace
+        pairs = sorted(graph.namespaces(), key=lambda pn: store.prefix(pn[1]) == pn[0])
+        return cls(dict(pairs), maxsize)
+
+    def _compute_qname(self, uri):
+        if not _is_valid_uri(uri):
+            return None
+
+        try:
+            split, _ = split_uri(uri)
+        except ValueError:
+            split = uri  # only a namespace with a non empty prefix
+
+        match = self._trie.longest(uri)
+        if match is not None and len(match[1]) >= len(split) and (match[0] or split != uri):
+            prefix, namespace = match
+            return prefix, namespace, uri[len(namespace):]
+
+    def qname_parts(self, uri):
+        """ (prefix, namespace, name) or None if there is no prefix """
+        return self._lookup(str(uri))
+
+    def compute_qname(self, uri):
+        """ (prefix, namespace, name), raises KeyError if there is no prefix """
+        match = self._lookup(str(uri))
+        if match is None:
+            raise KeyError('No known prefix for {}'.format(uri))
+
+        return match
+
+    def qname(self, uri, default=None):
+        """ prefix:name for uri or default if there is no prefix """
+        match = self._lookup(str(uri))
+        if match is None:
+            return default
+
+        prefix, _, name = match
+        return prefix + ':' + name
+
+    def qname_all(self, uris, default=None):
+        """ qname for each uri, default is used for the misses """
+        lookup = self._lookup
+        return [default if match is None else match[0] + ':' + match[2]
+                for match in (lookup(str(uri)) for uri in uris)]
+
+    def expand(self, curie):
+        """ URIRef for a curie, raises KeyError if the prefix is unknown """
+        prefix, suffix = curie.split(':', 1)
+        return rdflib.URIRef(self.namespaces[prefix] + suffix)
+
+    def expand_all(self, curies):
+        namespaces = self.namespaces
+        return [rdflib.URIRef(namespaces[prefix] + suffix)
+                for prefix, suffix in (curie.split(':', 1) for curie in curies)]
+
+    def cache_info(self):
+        return self._lookup.cache_info()